@@ -0,0 +1,34 @@
+import importlib
+import time
+
+from preprocessamento import contar_tokens
+
+# Módulos cuja importação carrega langchain, openai, pydantic e pandas
+MODULOS_PIPELINE = ("extracao", "historico", "triagem", "lote")
+
+
+def aquecer(modulos=MODULOS_PIPELINE):
+    """Importa o pipeline e prepara os recursos que são caros de criar.
+
+    Importa `modulos`, carrega a codificação do tiktoken (baixada no primeiro
+    uso) e constrói as chains de extração e de resumo, para que a primeira
+    triagem do processo não pague esses custos.
+    """
+    inicio = time.perf_counter()
+    for modulo in modulos:
+        importlib.import_module(modulo)
+    from extracao import AZURE_OPENAI_MODEL, obter_chain_extracao, obter_chain_resumo
+
+    contar_tokens("aquecimento", AZURE_OPENAI_MODEL)
+    try:
+        # As mesmas chains (sem retentativas próprias) usadas com o AGENDADOR_LLM
+        obter_chain_extracao(max_retries=0)
+        obter_chain_resumo(max_retries=0)
+    except Exception as e:
+        # Sem as credenciais, as chains ficam para o primeiro uso
+        print(f"Chains não construídas no aquecimento: {e}")
+    print(f"Aquecimento concluído em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    aquecer()
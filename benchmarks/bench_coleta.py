@@ -0,0 +1,84 @@
+"""Benchmark do download de notícias contra um servidor HTTP local.
+
+Cada página responde com um atraso fixo, simulando a latência de um portal de
+notícias. Compara o download serial (um worker) com o download concorrente.
+
+Uso: python benchmarks/bench_coleta.py [--links 50] [--atraso 0.2] [--workers 8]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import transporte  # noqa: E402
+from coleta import extrair_conteudo_links  # noqa: E402
+
+# Todas as "notícias" vêm do mesmo host local, que faz o papel de vários
+# portais; o ritmo por host do transporte não é o que se mede aqui
+transporte.LIMITADOR_HOSTS.taxa = 1e6
+transporte.LIMITADOR_HOSTS.rajada = 1e6
+
+HTML_ARTIGO = (
+    "<html><body><article><h1>Notícia {n}</h1>"
+    "<p>Texto da notícia número {n} sobre a operação da polícia.</p>"
+    "</article></body></html>"
+)
+
+
+def criar_servidor(atraso):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(atraso)
+            corpo = HTML_ARTIGO.format(n=self.path.strip("/")).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def medir(links, **kwargs):
+    inicio = time.perf_counter()
+    artigos = extrair_conteudo_links(links, cache=None, **kwargs)
+    return time.perf_counter() - inicio, artigos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, default=50)
+    parser.add_argument("--atraso", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.atraso)
+    porta = servidor.server_address[1]
+    links = [f"http://127.0.0.1:{porta}/{i}" for i in range(args.links)]
+
+    tempo_serial, artigos_serial = medir(links, max_workers=1)
+    tempo_paralelo, artigos_paralelo = medir(
+        links, max_workers=args.workers, max_por_host=args.workers
+    )
+    assert artigos_serial == artigos_paralelo
+
+    print(f"Links: {args.links} | atraso por página: {args.atraso}s")
+    print(f"Serial (1 worker): {tempo_serial:.2f}s")
+    print(f"Concorrente ({args.workers} workers): {tempo_paralelo:.2f}s")
+    print(f"Speedup: {tempo_serial / tempo_paralelo:.1f}x")
+
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
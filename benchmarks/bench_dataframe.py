@@ -0,0 +1,69 @@
+"""Benchmark da montagem do DataFrame de extrações.
+
+Compara o laço antigo, que fazia `pd.concat` do DataFrame inteiro a cada
+notícia classificada (custo quadrático), com `triagem.montar_dataframe`, que
+acumula os registros numa lista e monta o DataFrame uma única vez.
+
+Uso: python benchmarks/bench_dataframe.py [--noticias 500 2000 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triagem import COLUNAS_EXTRACAO, montar_dataframe  # noqa: E402
+
+
+def extracao_sintetica(i):
+    return {
+        "crimes": random.choice(["Nenhum", "Lavagem de dinheiro", "Fraude, Corrupção"]),
+        "risco": random.choice(["alto", "médio", "baixo"]),
+        "resumo": f"Resumo da notícia {i}. " * 5,
+        "link": f"https://portal.example/noticia/{i}",
+        "data_consulta": "2024-01-01 00:00:00",
+        "tokens_economizados": random.randint(0, 3000),
+    }
+
+
+def montar_com_concat(registros):
+    df = pd.DataFrame(columns=COLUNAS_EXTRACAO)
+    for registro in registros:
+        df = pd.concat([df, pd.DataFrame([registro])], ignore_index=True)
+    df["risco"] = pd.Categorical(
+        df["risco"], categories=["alto", "médio", "baixo"], ordered=True
+    )
+    return df
+
+
+def medir(funcao, registros):
+    inicio = time.perf_counter()
+    df = funcao(registros)
+    return time.perf_counter() - inicio, df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--noticias", type=int, nargs="+", default=[500, 2000, 5000])
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'notícias':>9} {'pd.concat':>11} {'lista':>9} {'ganho':>8}")
+    for quantidade in args.noticias:
+        registros = [extracao_sintetica(i) for i in range(quantidade)]
+        tempo_concat, df_concat = medir(montar_com_concat, registros)
+        tempo_lista, df_lista = medir(montar_dataframe, registros)
+        assert len(df_concat) == len(df_lista) == quantidade
+        print(
+            f"{quantidade:>9} {tempo_concat:>10.3f}s {tempo_lista:>8.3f}s "
+            f"{tempo_concat / tempo_lista:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
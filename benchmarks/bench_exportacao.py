@@ -0,0 +1,112 @@
+"""Benchmark da exportação de relatórios.
+
+Compara `df.to_excel` (openpyxl), usado antes, com os escritores em fluxo de
+`exportacao` (XlsxWriter em constant_memory e openpyxl write_only) e com o
+CSV, gerando o arquivo em memória como no botão de download.
+
+Uso: python benchmarks/bench_exportacao.py [--linhas 10000] [--repeticoes 3]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exportacao  # noqa: E402
+
+
+def relatorio_sintetico(linhas):
+    random.seed(0)
+    df = pd.DataFrame(
+        {
+            "crimes": [
+                random.choice(["Nenhum", "Lavagem de dinheiro", "Fraude, Corrupção"])
+                for _ in range(linhas)
+            ],
+            "risco": [random.choice(["alto", "médio", "baixo"]) for _ in range(linhas)],
+            "resumo": [
+                f"Resumo da notícia {i}: operação policial investiga o esquema. " * 4
+                for i in range(linhas)
+            ],
+            "link": [f"https://portal.example/noticia/{i}" for i in range(linhas)],
+            "data_consulta": ["2024-01-01 00:00:00"] * linhas,
+            "tokens_economizados": [random.randint(0, 3000) for _ in range(linhas)],
+            "duplicata_de": [None] * linhas,
+        }
+    )
+    df["risco"] = pd.Categorical(
+        df["risco"], categories=["alto", "médio", "baixo"], ordered=True
+    )
+    return df
+
+
+def to_excel_openpyxl(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def openpyxl_write_only(df):
+    buffer = io.BytesIO()
+    exportacao._escrever_openpyxl(df, buffer)
+    return buffer.getvalue()
+
+
+def xlsxwriter_constant_memory(df):
+    buffer = io.BytesIO()
+    exportacao._escrever_xlsxwriter(df, buffer)
+    return buffer.getvalue()
+
+
+VARIANTES = {
+    "df.to_excel (openpyxl)": to_excel_openpyxl,
+    "openpyxl write_only": openpyxl_write_only,
+    "xlsxwriter constant_memory": xlsxwriter_constant_memory,
+    "csv": exportacao.gerar_csv,
+}
+
+
+def medir(funcao, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        conteudo = funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+
+    # O pico de memória é medido à parte: o tracemalloc deixa tudo mais lento
+    tracemalloc.start()
+    funcao(df)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tempos), pico, len(conteudo)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    df = relatorio_sintetico(args.linhas)
+    print(f"{args.linhas} linhas")
+    print(f"{'variante':<28} {'tempo':>8} {'pico mem.':>10} {'tamanho':>10}")
+    for nome, funcao in VARIANTES.items():
+        if funcao is xlsxwriter_constant_memory and exportacao.xlsxwriter is None:
+            print(f"{nome:<28} {'(XlsxWriter não instalado)':>30}")
+            continue
+        tempo, pico, tamanho = medir(funcao, df, args.repeticoes)
+        print(
+            f"{nome:<28} {tempo:>7.2f}s {pico / 2**20:>8.1f}MB "
+            f"{tamanho / 2**20:>8.2f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark da extração de texto das notícias.
+
+Compara a extração antiga (get_text de todo p/div/span/article/section, que
+repete o texto dos elementos aninhados) com `coleta.extrair_texto_html`, com
+html.parser e, se instalado, lxml. Para cada variante informa o tempo total, os
+bytes de texto gerados e a quantidade estimada de tokens enviados à LLM.
+
+Uso: python benchmarks/bench_extracao_html.py [--corpus pasta_com_html] [--paginas 50]
+Sem --corpus, usa páginas sintéticas com a estrutura típica de um portal.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coleta import PARSER_HTML, extrair_texto_html, limpar_conteudo  # noqa: E402
+from preprocessamento import contar_tokens  # noqa: E402
+
+# Só define a codificação do tiktoken usada na contagem (cl100k_base)
+MODELO_TOKENS = "gpt-3.5-turbo"
+
+
+def extrair_texto_legado(html):
+    soup = BeautifulSoup(html, "html.parser")
+    conteudo_artigo = " ".join(
+        [
+            p.get_text()
+            for p in soup.find_all(["p", "div", "span", "article", "section"])
+        ]
+    )
+    return limpar_conteudo(conteudo_artigo)
+
+
+def pagina_sintetica(n):
+    paragrafos = "".join(
+        f"<div class='bloco'><p>Parágrafo {i} da notícia {n}: a <span>polícia</span> "
+        f"deflagrou a operação contra o esquema de lavagem de dinheiro.</p></div>"
+        for i in range(30)
+    )
+    menu = "".join(f"<li><a href='/s{i}'>Seção {i}</a></li>" for i in range(40))
+    return (
+        "<html><head><script>var x = 1;</script><style>p {}</style></head><body>"
+        f"<header><nav><ul>{menu}</ul></nav></header>"
+        f"<div class='container'><section><div class='row'><div class='col'>"
+        f"<article><h1>Notícia {n}</h1>{paragrafos}</article>"
+        "</div></div></section></div>"
+        "<aside><div><span>Mais lidas</span></div></aside>"
+        "<footer><div><p>Todos os direitos reservados.</p></div></footer>"
+        "</body></html>"
+    )
+
+
+def carregar_corpus(pasta, paginas):
+    if pasta:
+        arquivos = sorted(glob.glob(os.path.join(pasta, "*.html")))
+        corpus = []
+        for arquivo in arquivos:
+            with open(arquivo, "rb") as f:
+                corpus.append(f.read())
+        return corpus
+    return [pagina_sintetica(n).encode("utf-8") for n in range(paginas)]
+
+
+def medir(nome, extrator, corpus):
+    inicio = time.perf_counter()
+    textos = [extrator(html) for html in corpus]
+    tempo = time.perf_counter() - inicio
+    bytes_saida = sum(len(texto.encode("utf-8")) for texto in textos)
+    tokens = sum(contar_tokens(texto, MODELO_TOKENS) for texto in textos)
+    print(f"{nome:<28}{tempo:>10.3f}s{bytes_saida:>14,}{tokens:>12,}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None)
+    parser.add_argument("--paginas", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = carregar_corpus(args.corpus, args.paginas)
+    bytes_entrada = sum(len(html) for html in corpus)
+    print(f"Páginas: {len(corpus)} | HTML de entrada: {bytes_entrada:,} bytes")
+    print(f"{'Extrator':<28}{'tempo':>11}{'bytes saída':>14}{'tokens':>12}")
+
+    medir("legado (html.parser)", extrair_texto_legado, corpus)
+    medir(
+        "principal (html.parser)",
+        lambda html: extrair_texto_html(html, parser="html.parser"),
+        corpus,
+    )
+    if PARSER_HTML == "lxml":
+        medir("principal (lxml)", lambda html: extrair_texto_html(html, "lxml"), corpus)
+    else:
+        print("lxml não instalado; variante lxml ignorada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+"""Benchmark de ponta a ponta da triagem em lote, sem acesso à internet.
+
+Um servidor HTTP local faz o papel do Google, do Bing e dos portais de
+notícias, servindo as páginas de benchmarks/fixtures: as páginas de
+resultados têm os links reescritos para artigos do próprio servidor, e o
+texto de cada artigo é gerado de forma determinística a partir do link. Um
+segundo servidor imita a API de chat completions do Azure OpenAI, com
+latência configurável, e responde tanto à extração (function calling) quanto
+ao resumo.
+
+Cada tamanho de lote roda em um processo separado, com caches, histórico e
+saídas em um diretório temporário, e mede triagens por minuto, p50/p95 de
+cada etapa (a partir de `metricas.METRICAS`) e o pico de memória (RSS).
+
+Uso: python benchmarks/bench_triagem.py [--sujeitos 1 10 100] [--paginas 1]
+    [--motores google bing] [--atraso-llm 0.5] [--atraso-artigo 0.1]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Links das páginas de resultados gravadas, reescritos para o servidor local
+HOST_GRAVADO = "https://noticias.example/"
+
+# Os portais são servidos em vários endereços de loopback (no Linux, todo o
+# 127.0.0.0/8), já que os downloads simultâneos são limitados por host
+ENDERECOS_PORTAIS = [f"127.0.0.{i}" for i in range(1, 9)]
+
+SUJEITOS_FRASES = [
+    "A Polícia Federal",
+    "O Ministério Público",
+    "A Receita Federal",
+    "O Tribunal de Contas",
+    "A defesa de {sujeito}",
+    "A controladoria",
+    "O relator do caso",
+    "A comissão parlamentar",
+    "O juiz responsável",
+    "A assessoria de {sujeito}",
+]
+VERBOS = [
+    "investiga",
+    "apura",
+    "denunciou",
+    "afirmou ter identificado",
+    "pediu informações sobre",
+    "analisa",
+    "contestou",
+    "arquivou a apuração sobre",
+    "rastreou",
+    "questionou",
+]
+OBJETOS = [
+    "repasses de {valor} milhões",
+    "contratos firmados com {sujeito}",
+    "transferências a empresas de fachada",
+    "a movimentação financeira do grupo",
+    "pagamentos sem comprovação de serviço",
+    "a compra de imóveis em nome de terceiros",
+    "notas fiscais emitidas entre {ano} e {ano2}",
+    "o acordo de colaboração",
+    "aditivos de contratos de obras",
+    "remessas ao exterior",
+]
+COMPLEMENTOS = [
+    "segundo documentos obtidos pela reportagem",
+    "de acordo com a investigação",
+    "conforme o relatório divulgado nesta semana",
+    "em inquérito que tramita sob sigilo",
+    "após auditoria nas contas de {ano2}",
+    "na fase {fase} da operação",
+    "sem apresentar provas, segundo a defesa",
+    "com base em dados do Coaf",
+    "em nota enviada à imprensa",
+    "durante depoimento à comissão",
+]
+
+
+def ler_fixture(nome):
+    with open(os.path.join(FIXTURES, nome), encoding="utf-8") as arquivo:
+        return arquivo.read()
+
+
+def slug(texto):
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-")
+
+
+def gerar_paragrafos(semente, sujeito, quantidade=8):
+    """Parágrafos de notícia determinísticos para a `semente`."""
+    rng = random.Random(semente)
+    paragrafos = []
+    for _ in range(quantidade):
+        frases = []
+        for _ in range(rng.randint(3, 5)):
+            ano = rng.randint(2010, 2021)
+            frase = " ".join(
+                [
+                    rng.choice(SUJEITOS_FRASES),
+                    rng.choice(VERBOS),
+                    rng.choice(OBJETOS),
+                    rng.choice(COMPLEMENTOS),
+                ]
+            )
+            frases.append(
+                frase.format(
+                    sujeito=sujeito,
+                    valor=rng.randint(2, 900),
+                    ano=ano,
+                    ano2=ano + rng.randint(1, 3),
+                    fase=rng.randint(2, 40),
+                )
+                + "."
+            )
+        paragrafos.append("  <p>" + " ".join(frases) + "</p>")
+    return "\n".join(paragrafos)
+
+
+class SimuladorWeb:
+    """Servidores HTTP locais com os motores de busca e os portais."""
+
+    def __init__(self, atraso_busca, atraso_artigo, duplicatas):
+        self.atraso_busca = atraso_busca
+        self.atraso_artigo = atraso_artigo
+        self.duplicatas = duplicatas
+        self.paginas = {
+            "google": ler_fixture("google.html"),
+            "bing": ler_fixture("bing.html"),
+        }
+        self.artigo = ler_fixture("artigo.html")
+        self.servidores = []
+        self.portais = []
+
+    def iniciar(self):
+        simulador = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                parametros = {
+                    chave: valores[0] for chave, valores in parse_qs(url.query).items()
+                }
+                partes = url.path.strip("/").split("/")
+                if partes[-1] == "search" and partes[0] in simulador.paginas:
+                    time.sleep(simulador.atraso_busca)
+                    corpo = simulador.pagina_resultados(partes[0], parametros)
+                elif partes[0] == "noticia":
+                    time.sleep(simulador.atraso_artigo)
+                    corpo = simulador.pagina_artigo(partes[1:])
+                else:
+                    self.send_error(404)
+                    return
+
+                corpo = corpo.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        for endereco in ENDERECOS_PORTAIS:
+            try:
+                servidor = ThreadingHTTPServer((endereco, 0), Handler)
+            except OSError:
+                # Fora do Linux, só o 127.0.0.1 costuma estar disponível
+                continue
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            self.servidores.append(servidor)
+            self.portais.append(f"http://{endereco}:{servidor.server_address[1]}")
+        return self
+
+    @property
+    def url_busca(self):
+        return self.portais[0]
+
+    def pagina_resultados(self, motor, parametros):
+        consulta = parametros.get("q", "")
+        inicio = int(parametros.get("start", parametros.get("first", 0)))
+
+        def reescrever(encontrado):
+            # A mesma notícia recebe o mesmo link em qualquer motor
+            caminho = encontrado.group(1)
+            portal = self.portais[zlib.crc32(caminho.encode()) % len(self.portais)]
+            return f"{portal}/noticia/{quote(slug(consulta))}/{inicio}/{caminho}"
+
+        html = self.paginas[motor].replace("{consulta}", consulta)
+        return re.sub(re.escape(HOST_GRAVADO) + r"([^\"&\s]+)", reescrever, html)
+
+    def pagina_artigo(self, partes):
+        consulta, inicio, *caminho = partes
+        sujeito = consulta.replace("-", " ").title()
+        semente = "/".join(partes)
+        # Parte das notícias é a mesma matéria republicada em outro portal
+        if random.Random(semente).random() < self.duplicatas:
+            semente = f"{consulta}/materia-republicada"
+        titulo = caminho[-1].replace("-", " ").capitalize() if caminho else sujeito
+        return (
+            self.artigo.replace("{titulo}", titulo)
+            .replace("{data}", "10/03/2023 08h15")
+            .replace("{paragrafos}", gerar_paragrafos(semente, sujeito))
+        )
+
+    def parar(self):
+        for servidor in self.servidores:
+            servidor.shutdown()
+
+
+def resposta_chat(corpo, modelo):
+    """Resposta no formato de chat completions para a requisição `corpo`."""
+    mensagens = corpo.get("messages", [])
+    texto = " ".join(str(mensagem.get("content") or "") for mensagem in mensagens)
+    # Mesma estimativa grosseira do tiktoken para português: ~4 caracteres/token
+    tokens_prompt = max(1, len(texto) // 4)
+    digest = hashlib.sha256(texto.encode("utf-8")).digest()
+
+    mensagem = {"role": "assistant", "content": None}
+    if corpo.get("functions") or corpo.get("function_call"):
+        argumentos = {
+            "crimes": ["Nenhum crime mencionado", "Lavagem de dinheiro", "Corrupção"][
+                digest[0] % 3
+            ],
+            "risco": ["baixo", "médio", "alto"][digest[1] % 3],
+            "resumo": "A notícia relata uma investigação sobre repasses e "
+            f"contratos (resumo {digest[:4].hex()}).",
+        }
+        mensagem["function_call"] = {
+            "name": "Extrair",
+            "arguments": json.dumps(argumentos, ensure_ascii=False),
+        }
+        finalizacao = "function_call"
+    else:
+        mensagem["content"] = (
+            "Os resumos relatam investigações sobre contratos e repasses "
+            f"financeiros (resumo {digest[:4].hex()})."
+        )
+        finalizacao = "stop"
+
+    tokens_resposta = len(json.dumps(mensagem)) // 4
+    return {
+        "id": f"chatcmpl-{digest[:6].hex()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": modelo,
+        "choices": [{"index": 0, "message": mensagem, "finish_reason": finalizacao}],
+        "usage": {
+            "prompt_tokens": tokens_prompt,
+            "completion_tokens": tokens_resposta,
+            "total_tokens": tokens_prompt + tokens_resposta,
+        },
+    }
+
+
+def criar_servidor_llm(atraso, variacao, modelo):
+    """Imita o endpoint de chat completions do Azure OpenAI."""
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+            with lock:
+                espera = atraso * rng.uniform(1 - variacao, 1 + variacao)
+            time.sleep(max(0.0, espera))
+
+            resposta = json.dumps(resposta_chat(corpo, modelo)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(resposta)))
+            self.end_headers()
+            self.wfile.write(resposta)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Em KB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def executar_lote(args):
+    """Processo filho: roda um lote de `args.filho` sujeitos e grava as medidas."""
+    sys.path.insert(0, RAIZ)
+    import busca
+    import lote
+    import transporte
+    from metricas import METRICAS
+
+    class MotorGoogleLocal(busca.MotorGoogle):
+        def baixar(self, query, start, num_links):
+            url = f"{args.url_busca}/google/search?q={quote(query)}&start={start}"
+            return transporte.get(url, headers=busca.HEADERS_BUSCA).content
+
+    class MotorBingLocal(busca.MotorBing):
+        def baixar(self, query, start, num_links):
+            url = (
+                f"{args.url_busca}/bing/search?q={quote(query)}"
+                f"&first={start}&count={num_links}"
+            )
+            return transporte.get(url, headers=busca.HEADERS_BUSCA).content
+
+    busca.MOTORES["google"] = MotorGoogleLocal()
+    busca.MOTORES["bing"] = MotorBingLocal()
+
+    sujeitos = [f"Sujeito {numero:03d} Participações" for numero in range(args.filho)]
+    antes = METRICAS.instantaneo()
+    inicio = time.perf_counter()
+    registros = list(
+        lote.gerar_lote(
+            sujeitos,
+            os.path.join(args.diretorio, "lote"),
+            args.paginas,
+            args.motores,
+            args.workers,
+        )
+    )
+    duracao = time.perf_counter() - inicio
+    etapas, contadores = METRICAS.resumo_execucao(antes, manter_rotulos=("etapa",))
+
+    with open(args.resultado, "w", encoding="utf-8") as arquivo:
+        json.dump(
+            {
+                "sujeitos": len(sujeitos),
+                "erros": sum(1 for registro in registros if registro.get("erro")),
+                "noticias": sum(
+                    registro.get("num_noticias") or 0 for registro in registros
+                ),
+                "duracao_s": duracao,
+                "pico_rss_mb": pico_rss_mb(),
+                "etapas": etapas,
+                "chamadas_llm": sum(
+                    etapa["quantidade"]
+                    for etapa in etapas
+                    if etapa["etapa"] == "llm_segundos"
+                ),
+            },
+            arquivo,
+        )
+
+
+def medir_lote(args, sujeitos, simulador, servidor_llm):
+    with tempfile.TemporaryDirectory(prefix="bench_triagem_") as diretorio:
+        ambiente = dict(
+            os.environ,
+            DIRETORIO_CACHE=os.path.join(diretorio, "cache"),
+            HISTORICO_ARQUIVO=os.path.join(diretorio, "historico.sqlite3"),
+            METRICAS_ARQUIVO=os.path.join(diretorio, "metricas.prom"),
+            # Os portais são locais: o ritmo por host não é o que se mede aqui
+            HTTP_HOST_RPS="1000000",
+            AZURE_OPENAI_API_KEY="bench",
+            AZURE_OPENAI_ENDPOINT=f"http://127.0.0.1:{servidor_llm.server_address[1]}",
+            AZURE_OPENAI_API_VERSION="2024-02-01",
+            AZURE_OPENAI_DEPLOYMENT="bench",
+            AZURE_OPENAI_MODEL=args.modelo,
+            AZURE_OPENAI_RPM=str(args.rpm),
+            AZURE_OPENAI_TPM=str(args.tpm),
+        )
+        ambiente.pop("METRICAS_PORTA", None)
+        resultado = os.path.join(diretorio, "resultado.json")
+        comando = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--filho",
+            str(sujeitos),
+            "--diretorio",
+            diretorio,
+            "--resultado",
+            resultado,
+            "--url-busca",
+            simulador.url_busca,
+            "--paginas",
+            str(args.paginas),
+            "--workers",
+            str(args.workers),
+            "--motores",
+            *args.motores,
+        ]
+        # A saída da triagem (um print por notícia) é descartada
+        subprocess.run(comando, env=ambiente, stdout=subprocess.DEVNULL, check=True)
+        with open(resultado, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+
+
+def imprimir(medidas):
+    print(
+        f"{'sujeitos':>8} {'notícias':>9} {'LLM':>6} {'tempo':>8} "
+        f"{'triagens/min':>13} {'pico RSS':>10} {'erros':>6}"
+    )
+    for medida in medidas:
+        print(
+            f"{medida['sujeitos']:>8} {medida['noticias']:>9} "
+            f"{medida['chamadas_llm']:>6} {medida['duracao_s']:>7.1f}s "
+            f"{medida['sujeitos'] / medida['duracao_s'] * 60:>13.1f} "
+            f"{medida['pico_rss_mb']:>8.0f}MB {medida['erros']:>6}"
+        )
+
+    for medida in medidas:
+        print(f"\n{medida['sujeitos']} sujeitos")
+        print(f"  {'etapa':<32} {'n':>6} {'p50':>9} {'p95':>9}")
+        for etapa in medida["etapas"]:
+            nome = " ".join([etapa["etapa"], *etapa["rotulos"].values()])
+            print(
+                f"  {nome:<32} {etapa['quantidade']:>6} "
+                f"{etapa['p50_s'] * 1000:>7.1f}ms {etapa['p95_s'] * 1000:>7.1f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sujeitos", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--paginas", type=int, default=1)
+    parser.add_argument("--motores", nargs="+", default=["google"])
+    parser.add_argument("--workers", type=int, default=2, help="sujeitos simultâneos")
+    parser.add_argument("--atraso-busca", type=float, default=0.3)
+    parser.add_argument("--atraso-artigo", type=float, default=0.1)
+    parser.add_argument("--atraso-llm", type=float, default=0.5)
+    parser.add_argument(
+        "--variacao-llm", type=float, default=0.5, help="variação relativa do atraso"
+    )
+    parser.add_argument(
+        "--duplicatas",
+        type=float,
+        default=0.1,
+        help="fração das notícias republicadas por outro portal",
+    )
+    parser.add_argument("--modelo", default="gpt-35-turbo")
+    # Sem limite de quota por padrão: mede o pipeline, e não o deployment
+    parser.add_argument("--rpm", type=int, default=1000000)
+    parser.add_argument("--tpm", type=int, default=1000000000)
+    # Uso interno: execução de um lote no processo filho
+    parser.add_argument("--filho", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", help=argparse.SUPPRESS)
+    parser.add_argument("--url-busca", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho is not None:
+        executar_lote(args)
+        return
+
+    simulador = SimuladorWeb(
+        args.atraso_busca, args.atraso_artigo, args.duplicatas
+    ).iniciar()
+    servidor_llm = criar_servidor_llm(args.atraso_llm, args.variacao_llm, args.modelo)
+    print(
+        f"Motores: {', '.join(args.motores)} | páginas: {args.paginas} | "
+        f"portais: {len(simulador.portais)} | atraso LLM: {args.atraso_llm}s | "
+        f"sujeitos simultâneos: {args.workers}"
+    )
+
+    medidas = [
+        medir_lote(args, sujeitos, simulador, servidor_llm)
+        for sujeitos in args.sujeitos
+    ]
+    imprimir(medidas)
+
+    simulador.parar()
+    servidor_llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from bs4 import BeautifulSoup
+
+import configuracao
+import transporte
+from cache import DIRETORIO_CACHE, CacheSQLite, gerar_chave
+from metricas import METRICAS
+from urls import deduplicar_urls, normalizar_url
+
+# Por quanto tempo uma página de resultados parseada é reaproveitada
+BUSCA_CACHE_TTL = float(configuracao.obter("BUSCA_CACHE_TTL_HORAS", 12)) * 3600
+
+CACHE_BUSCA = CacheSQLite(
+    DIRETORIO_CACHE / "busca.sqlite3",
+    ttl=BUSCA_CACHE_TTL,
+    max_itens=int(configuracao.obter("BUSCA_CACHE_MAX_ITENS", 5000)),
+)
+
+
+def ler_pagina_do_cache(motor, query, start, num_links, cache=CACHE_BUSCA):
+    if cache is None:
+        return None
+    return cache.obter(gerar_chave(motor, query, start, num_links))
+
+
+def salvar_pagina_no_cache(motor, query, start, num_links, links, cache=CACHE_BUSCA):
+    # Páginas sem resultados não são guardadas, para não memorizar bloqueios/CAPTCHAs
+    if cache is not None and links:
+        cache.salvar(gerar_chave(motor, query, start, num_links), links)
+
+
+def obter_pagina_com_cache(
+    motor, query, start, num_links, buscar, forcar_atualizacao=False, cache=CACHE_BUSCA
+):
+    """Retorna os links de uma página de resultados, consultando o cache antes.
+
+    `buscar` é chamado sem argumentos para baixar e parsear a página quando ela
+    não está no cache ou quando `forcar_atualizacao` é verdadeiro.
+    """
+    if not forcar_atualizacao:
+        links = ler_pagina_do_cache(motor, query, start, num_links, cache)
+        if links is not None:
+            return links
+
+    links = buscar()
+    salvar_pagina_no_cache(motor, query, start, num_links, links, cache)
+    return links
+
+
+HEADERS_BUSCA = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/91.0.4472.124 Safari/537.36"
+    )
+}
+
+# Constante do Reciprocal Rank Fusion (RRF) usada ao combinar motores
+K_FUSAO = 60
+
+# Indícios de que o motor respondeu com um CAPTCHA em vez dos resultados
+PALAVRAS_BLOQUEIO_BUSCA = [
+    "captcha",
+    "unusual traffic",
+    "tráfego incomum",
+    "/sorry/index",
+]
+
+# Páginas de resultados buscadas ao mesmo tempo em cada motor
+PAGINAS_SIMULTANEAS = int(configuracao.obter("BUSCA_PAGINAS_SIMULTANEAS", 3))
+
+
+def obter_resultados_pesquisa_google(query, start=0):
+    url = f"https://www.google.com/search?q={query}&start={start}"
+
+    try:
+        response = transporte.get(url, headers=HEADERS_BUSCA)
+        if response.status_code == 200:
+            return response.content
+        else:
+            print(f"Erro ao fazer a requisição. Status code: {response.status_code}")
+            return None
+    except Exception as e:
+        print(f"Erro ao fazer a requisição: {e}")
+        return None
+
+
+def obter_resultados_pesquisa_bing(query, start=0, num_links=10):
+    url = f"https://www.bing.com/search?q={query}&first={start}&count={num_links}&setlang=pt-br&cc=BR&mkt=pt-BR"
+
+    try:
+        response = transporte.get(url, headers=HEADERS_BUSCA, timeout=10)
+        if response.status_code == 200:
+            return response.content
+        else:
+            print(f"Erro ao buscar no Bing. Status code: {response.status_code}")
+            return None
+    except Exception as e:
+        print(f"Erro ao acessar Bing: {e}")
+        return None
+
+
+def pagina_de_bloqueio(html_content):
+    """Indica se a página de resultados é um CAPTCHA/aviso de tráfego incomum."""
+    if not html_content:
+        return False
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", errors="ignore")
+    html_content = html_content.lower()
+    return any(palavra in html_content for palavra in PALAVRAS_BLOQUEIO_BUSCA)
+
+
+def _links_unicos(urls, num_links):
+    links = []
+    for url in deduplicar_urls(urls):
+        if len(links) >= num_links:
+            break
+        if url and urlparse(url).scheme in ["http", "https"]:
+            links.append(url)
+    return links
+
+
+def parsear_resultados_google(html_content, num_links):
+    """Links dos resultados (`div.g`) de uma página do Google, na ordem do ranking."""
+    if not html_content:
+        return []
+
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    urls = []
+    for div in soup.find_all("div", class_="g"):
+        link_tag = div.find("a", href=True)
+        if link_tag:
+            url = link_tag["href"]
+
+            if url.startswith("/url?q="):
+                parsed_url = parse_qs(urlparse(url).query)
+                url = parsed_url.get("q", [None])[0]
+
+            if url:
+                urls.append(url)
+
+    return _links_unicos(urls, num_links)
+
+
+def parsear_resultados_bing(html_content, num_links):
+    """Links dos resultados (`li.b_algo`) de uma página do Bing, na ordem do ranking."""
+    if not html_content:
+        return []
+
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    urls = []
+    for li in soup.find_all("li", class_="b_algo"):
+        link_tag = li.find("a", href=True)
+        if link_tag:
+            urls.append(link_tag["href"])
+
+    return _links_unicos(urls, num_links)
+
+
+class MotorBusca(ABC):
+    """Motor de busca: baixa e parseia uma página de resultados.
+
+    Subclasses definem `nome` (usado também na chave do cache), `baixar` e
+    `parsear`; sem os dois métodos, a subclasse não pode ser instanciada.
+    `inicio` converte o número da página no deslocamento do motor.
+    """
+
+    nome = None
+    host = None
+    resultados_por_pagina = 10
+
+    def inicio(self, pagina):
+        return pagina * self.resultados_por_pagina
+
+    @abstractmethod
+    def baixar(self, query, start, num_links):
+        """HTML da página de resultados que começa em `start`."""
+
+    @abstractmethod
+    def parsear(self, html_content, num_links):
+        """Links da página de resultados, na ordem do ranking."""
+
+    def buscar(self, query, start, num_links):
+        html_content = self.baixar(query, start, num_links)
+        links = self.parsear(html_content, num_links)
+        if not links and pagina_de_bloqueio(html_content):
+            print(f"CAPTCHA/bloqueio detectado na busca do {self.nome}")
+            transporte.LIMITADOR_HOSTS.registrar_bloqueio(f"https://{self.host}/")
+        return links
+
+
+class MotorGoogle(MotorBusca):
+    nome = "google"
+    host = "www.google.com"
+
+    def baixar(self, query, start, num_links):
+        return obter_resultados_pesquisa_google(query, start=start)
+
+    def parsear(self, html_content, num_links):
+        return parsear_resultados_google(html_content, num_links)
+
+
+class MotorBing(MotorBusca):
+    nome = "bing"
+    host = "www.bing.com"
+
+    def baixar(self, query, start, num_links):
+        return obter_resultados_pesquisa_bing(query, start=start, num_links=num_links)
+
+    def parsear(self, html_content, num_links):
+        return parsear_resultados_bing(html_content, num_links)
+
+
+MOTORES = {motor.nome: motor for motor in (MotorGoogle(), MotorBing())}
+
+
+def obter_motor(motor):
+    """Aceita o nome de um motor registrado em MOTORES ou uma instância."""
+    return MOTORES[motor] if isinstance(motor, str) else motor
+
+
+def _buscar_medindo(motor, query, start, num_links):
+    with METRICAS.medir("busca_pagina_segundos", motor=motor.nome):
+        return motor.buscar(query, start, num_links)
+
+
+def obter_pagina(motor, query, start, num_links, forcar_atualizacao=False):
+    motor = obter_motor(motor)
+    return obter_pagina_com_cache(
+        motor.nome,
+        query,
+        start,
+        num_links,
+        lambda: _buscar_medindo(motor, query, start, num_links),
+        forcar_atualizacao=forcar_atualizacao,
+    )
+
+
+def fundir_rankings(listas_de_links, k=K_FUSAO):
+    """Combina rankings de vários motores com Reciprocal Rank Fusion.
+
+    Links que apontam para a mesma página (ver `urls.normalizar_url`) são
+    contados uma vez, e a URL mantida é a primeira vista.
+    """
+    pontuacoes = {}
+    originais = {}
+    for links in listas_de_links:
+        for posicao, link in enumerate(links):
+            chave = normalizar_url(link)
+            originais.setdefault(chave, link)
+            pontuacoes[chave] = pontuacoes.get(chave, 0) + 1 / (k + posicao + 1)
+
+    ordenadas = sorted(pontuacoes, key=pontuacoes.get, reverse=True)
+    return [originais[chave] for chave in ordenadas]
+
+
+def gerar_links_de_varias_paginas(
+    query,
+    num_paginas,
+    num_links_por_pagina=10,
+    motores=("google",),
+    forcar_atualizacao=False,
+    paginas_simultaneas=PAGINAS_SIMULTANEAS,
+):
+    """Produz os links de cada página de resultados assim que ela é parseada.
+
+    Até `paginas_simultaneas` páginas à frente são buscadas em paralelo em cada
+    motor, o que limita as requisições simultâneas a um mesmo motor; as páginas
+    são produzidas em ordem. Com mais de um motor, a mesma página de cada motor
+    é buscada e os resultados são fundidos (RRF) antes de seguir. Links já
+    produzidos, mesmo que em outra variante de URL, não se repetem.
+    """
+    motores = [obter_motor(motor) for motor in motores]
+    paginas_simultaneas = max(1, paginas_simultaneas)
+    vistos = set()
+
+    with ThreadPoolExecutor(
+        max_workers=paginas_simultaneas * len(motores), thread_name_prefix="busca"
+    ) as executor:
+
+        def submeter(pagina):
+            return [
+                executor.submit(
+                    obter_pagina,
+                    motor,
+                    query,
+                    motor.inicio(pagina),
+                    num_links_por_pagina,
+                    forcar_atualizacao,
+                )
+                for motor in motores
+            ]
+
+        em_andamento = deque(
+            submeter(pagina) for pagina in range(min(paginas_simultaneas, num_paginas))
+        )
+        proxima = len(em_andamento)
+
+        for pagina in range(num_paginas):
+            futuros = em_andamento.popleft()
+            if proxima < num_paginas:
+                em_andamento.append(submeter(proxima))
+                proxima += 1
+
+            novos_links = fundir_rankings(futuro.result() for futuro in futuros)
+            if not novos_links:
+                print(f"Sem resultados na página {pagina + 1}. Parando a busca.")
+                # Interrompe a busca se não encontrar novos resultados.
+                for futuros in em_andamento:
+                    for futuro in futuros:
+                        futuro.cancel()
+                break
+
+            for link in novos_links:
+                chave = normalizar_url(link)
+                if chave not in vistos:
+                    vistos.add(chave)
+                    yield link
+
+
+def obter_links_de_varias_paginas(
+    query,
+    num_paginas,
+    num_links_por_pagina=10,
+    motores=("google",),
+    forcar_atualizacao=False,
+):
+    return list(
+        gerar_links_de_varias_paginas(
+            query, num_paginas, num_links_por_pagina, motores, forcar_atualizacao
+        )
+    )
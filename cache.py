@@ -0,0 +1,140 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import configuracao
+from metricas import METRICAS
+
+DIRETORIO_CACHE = Path(
+    configuracao.obter("DIRETORIO_CACHE", Path(__file__).parent / "output" / "cache")
+)
+
+
+def gerar_chave(*partes):
+    """Hash estável (sha256) de uma sequência de valores serializáveis em JSON."""
+    conteudo = json.dumps(partes, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheSQLite:
+    """Cache chave-valor persistente em SQLite, compartilhado entre threads.
+
+    Os valores são serializados em JSON. Entradas mais antigas que `ttl`
+    segundos são tratadas como ausentes, e quando o cache passa de
+    `max_itens` entradas ou `max_bytes` bytes as menos usadas recentemente
+    são removidas (LRU).
+    """
+
+    def __init__(self, caminho, ttl=None, max_itens=None, max_bytes=None):
+        self.caminho = Path(caminho)
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(
+            str(self.caminho), check_same_thread=False, isolation_level=None
+        )
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+            """)
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_acessado_em ON cache (acessado_em)"
+        )
+
+    def _expirado(self, criado_em, agora):
+        return self.ttl is not None and agora - criado_em > self.ttl
+
+    def obter(self, chave, padrao=None):
+        agora = time.time()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT valor, criado_em FROM cache WHERE chave = ?", (chave,)
+            ).fetchone()
+
+            if linha is None or self._expirado(linha[1], agora):
+                if linha is not None:
+                    self._conexao.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+                self.misses += 1
+                METRICAS.incrementar(
+                    "cache_consultas_total", cache=self.caminho.stem, resultado="miss"
+                )
+                return padrao
+
+            self._conexao.execute(
+                "UPDATE cache SET acessado_em = ? WHERE chave = ?", (agora, chave)
+            )
+            self.hits += 1
+        METRICAS.incrementar(
+            "cache_consultas_total", cache=self.caminho.stem, resultado="hit"
+        )
+        return json.loads(linha[0])
+
+    def salvar(self, chave, valor):
+        conteudo = json.dumps(valor, ensure_ascii=False)
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                (chave, conteudo, len(conteudo.encode("utf-8")), agora, agora),
+            )
+            self._remover_excedentes()
+
+    def remover(self, chave):
+        with self._lock:
+            self._conexao.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+
+    def _remover_excedentes(self):
+        if self.max_itens is not None:
+            self._conexao.execute(
+                """
+                DELETE FROM cache WHERE chave IN (
+                    SELECT chave FROM cache ORDER BY acessado_em DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_itens,),
+            )
+
+        if self.max_bytes is not None:
+            total = self._conexao.execute(
+                "SELECT COALESCE(SUM(tamanho), 0) FROM cache"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                linhas = self._conexao.execute(
+                    "SELECT chave, tamanho FROM cache ORDER BY acessado_em"
+                ).fetchall()
+                removidas = []
+                for chave, tamanho in linhas:
+                    if total <= self.max_bytes:
+                        break
+                    removidas.append((chave,))
+                    total -= tamanho
+                self._conexao.executemany(
+                    "DELETE FROM cache WHERE chave = ?", removidas
+                )
+
+    def estatisticas(self):
+        with self._lock:
+            itens, tamanho = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "itens": itens,
+            "bytes": tamanho,
+        }
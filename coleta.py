@@ -0,0 +1,396 @@
+import base64
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+import configuracao
+import transporte
+from cache import DIRETORIO_CACHE, CacheSQLite
+from fluxo import mapear_em_fluxo
+from metricas import METRICAS
+from urls import normalizar_url
+
+HEADERS_ARTIGO = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+}
+
+PALAVRAS_BLOQUEIO = [
+    "enable javascript",
+    "ativar javascript",
+    "automated requests",
+    "captcha",
+    "verify you are human",
+    "zscaler to protect",
+]
+# Sites bloqueados, pelo nome registrado sob qualquer sufixo público
+# (google.com, google.com.ar, maps.google.com.mx, transfermarkt.co.uk...)
+SITES_BLOQUEIO = [
+    "google",
+    "youtube",
+    "facebook",
+    "instagram",
+    "transfermarkt",
+    "twitter",
+    "tiktok",
+    "linkedin",
+    "wikipedia",
+]
+# Segundo nível dos sufixos de país (com.br, co.uk, gob.mx...)
+SEGUNDO_NIVEL_PAIS = {"com", "co", "org", "net", "gov", "gob", "edu", "ac"}
+
+# Arquivos que não são notícias, descartados pela extensão antes do download
+EXTENSOES_IGNORADAS = (
+    ".pdf",
+    ".doc",
+    ".docx",
+    ".xls",
+    ".xlsx",
+    ".ppt",
+    ".pptx",
+    ".zip",
+    ".rar",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".mp3",
+    ".mp4",
+    ".avi",
+    ".mov",
+)
+TIPOS_HTML = ("text/html", "application/xhtml+xml", "text/plain")
+# Páginas maiores que isso são descartadas (pelo Content-Length) ou truncadas
+MAX_BYTES_PAGINA = int(float(configuracao.obter("MAX_MB_PAGINA", 5)) * 1024 * 1024)
+
+# Limites padrão de concorrência do download de artigos
+MAX_WORKERS = 8
+MAX_POR_HOST = 2
+
+# Incrementar sempre que a extração de texto mudar, para reprocessar as páginas
+# guardadas no cache
+VERSAO_EXTRATOR = 3
+
+# lxml é bem mais rápido que o html.parser, mas é opcional
+try:
+    import lxml  # noqa: F401
+
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+# Elementos que nunca fazem parte do corpo da notícia
+TAGS_DESCARTADAS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "nav",
+    "aside",
+}
+# Cabeçalhos e rodapés da página são descartados, mas dentro de um
+# article/main costumam trazer o título e a autoria da notícia. Formulários não
+# são descartados: páginas ASP.NET WebForms envolvem o corpo inteiro num <form>
+TAGS_SECAO = {"header", "footer"}
+TAGS_CONTEUDO = {"article", "main"}
+# Tamanho mínimo do texto de um article/main para ser tratado como o conteúdo
+MIN_CARACTERES_CONTEUDO = 500
+
+# Páginas validadas há menos de HTTP_CACHE_MAX_AGE segundos não são
+# revalidadas; o cache é limitado a HTTP_CACHE_MAX_MB megabytes
+HTTP_CACHE_MAX_AGE = float(configuracao.obter("HTTP_CACHE_MAX_AGE_HORAS", 24)) * 3600
+HTTP_CACHE_MAX_MB = float(configuracao.obter("HTTP_CACHE_MAX_MB", 500))
+
+CACHE_PAGINAS = CacheSQLite(
+    DIRETORIO_CACHE / "paginas.sqlite3",
+    max_bytes=int(HTTP_CACHE_MAX_MB * 1024 * 1024),
+)
+
+
+def limpar_conteudo(conteudo):
+    conteudo_limpo = conteudo.replace("\\", "").replace("\n", "").replace("\r", " ")
+    conteudo_limpo = re.sub(" +", " ", conteudo_limpo)
+
+    return conteudo_limpo.strip()
+
+
+def _sufixo_publico(rotulos):
+    """Se os `rotulos` formam um sufixo público: um TLD ou "com.br", "co.uk"..."""
+    if len(rotulos) == 1:
+        return True
+    return (
+        len(rotulos) == 2 and rotulos[0] in SEGUNDO_NIVEL_PAIS and len(rotulos[1]) == 2
+    )
+
+
+def site_bloqueado(link):
+    rotulos = (urlparse(link).hostname or "").lower().split(".")
+    return any(
+        rotulo in SITES_BLOQUEIO and _sufixo_publico(rotulos[posicao + 1 :])
+        for posicao, rotulo in enumerate(rotulos)
+    )
+
+
+def extensao_ignorada(link):
+    return urlparse(link).path.lower().endswith(EXTENSOES_IGNORADAS)
+
+
+def conteudo_bloqueado(conteudo):
+    conteudo = conteudo.lower()
+    return any(palavra in conteudo for palavra in PALAVRAS_BLOQUEIO)
+
+
+class LimitadorPorHost:
+    """Limita o número de downloads simultâneos para um mesmo host."""
+
+    def __init__(self, max_por_host=MAX_POR_HOST):
+        self.max_por_host = max_por_host
+        self._lock = threading.Lock()
+        self._semaforos = defaultdict(
+            lambda: threading.BoundedSemaphore(self.max_por_host)
+        )
+
+    def semaforo(self, link):
+        host = urlparse(link).hostname or ""
+        with self._lock:
+            return self._semaforos[host]
+
+
+def extrair_texto_html(html, parser=None):
+    """Extrai o texto principal de uma página, emitindo cada nó de texto uma vez.
+
+    Remove scripts, menus, rodapés e afins e, quando existe um `article`/`main`
+    com texto suficiente, restringe a extração a ele.
+    """
+    soup = BeautifulSoup(html, parser or PARSER_HTML)
+
+    # Uma única varredura da árvore: find_all com lista de nomes é bem mais lento
+    descartadas = []
+    candidatos = []
+    for tag in soup.find_all(True):
+        if tag.name in TAGS_DESCARTADAS:
+            descartadas.append(tag)
+        elif tag.name in TAGS_SECAO and tag.find_parent(TAGS_CONTEUDO) is None:
+            descartadas.append(tag)
+        elif tag.name in TAGS_CONTEUDO:
+            candidatos.append(tag)
+
+    for tag in descartadas:
+        if not tag.decomposed:
+            tag.decompose()
+
+    raiz = soup.body or soup
+    textos_candidatos = [tag.get_text(" ") for tag in candidatos if not tag.decomposed]
+    if textos_candidatos:
+        melhor = max(textos_candidatos, key=len)
+        if len(melhor) >= MIN_CARACTERES_CONTEUDO:
+            return limpar_conteudo(melhor)
+
+    return limpar_conteudo(raiz.get_text(" "))
+
+
+def _ler_corpo(link, headers, timeout):
+    """GET em streaming que só lê o corpo de páginas HTML de tamanho razoável.
+
+    Retorna (response, corpo), com corpo None quando a resposta não é 2xx, o
+    Content-Type não é de página ou o Content-Length passa de MAX_BYTES_PAGINA.
+    Corpos sem Content-Length são truncados em MAX_BYTES_PAGINA.
+    """
+    with transporte.get(
+        link, headers=headers, timeout=timeout, stream=True
+    ) as response:
+        if response.status_code < 200 or response.status_code >= 300:
+            return response, None
+
+        tipo = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if tipo and tipo not in TIPOS_HTML:
+            print(f"Ignorando {link}: Content-Type {tipo}")
+            return response, None
+
+        tamanho = response.headers.get("Content-Length")
+        if tamanho and tamanho.isdigit() and int(tamanho) > MAX_BYTES_PAGINA:
+            print(f"Ignorando {link}: Content-Length {tamanho} bytes")
+            return response, None
+
+        corpo = bytearray()
+        for bloco in response.iter_content(64 * 1024):
+            corpo += bloco
+            if len(corpo) >= MAX_BYTES_PAGINA:
+                print(f"Truncando {link} em {MAX_BYTES_PAGINA} bytes")
+                break
+        return response, bytes(corpo[:MAX_BYTES_PAGINA])
+
+
+def _ler_corpo_medindo(link, headers, timeout):
+    host = urlparse(link).hostname or ""
+    with METRICAS.medir("download_segundos", host=host):
+        response, corpo = _ler_corpo(link, headers, timeout)
+    if corpo:
+        METRICAS.incrementar("download_bytes_total", len(corpo), host=host)
+    return response, corpo
+
+
+def _baixar(link, headers, limitador, timeout):
+    if limitador is not None:
+        with limitador.semaforo(link):
+            return _ler_corpo_medindo(link, headers, timeout)
+    return _ler_corpo_medindo(link, headers, timeout)
+
+
+def _extrair_texto(corpo):
+    with METRICAS.medir("parse_segundos"):
+        return extrair_texto_html(corpo)
+
+
+def _salvar_no_cache(cache, chave, response, corpo, conteudo):
+    cache.salvar(
+        chave,
+        {
+            "corpo": base64.b64encode(corpo).decode("ascii"),
+            "conteudo": conteudo,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "versao_extrator": VERSAO_EXTRATOR,
+            "validado_em": time.time(),
+        },
+    )
+
+
+def extrair_conteudo_link(link, limitador=None, timeout=None, cache=CACHE_PAGINAS):
+    """Baixa e limpa uma notícia.
+
+    Retorna o dicionário {"link", "conteudo"}, com conteúdo vazio em caso de
+    erro, status fora de 2xx ou bloqueio, e um indicador de bloqueio.
+
+    Com `cache`, páginas validadas há menos de `HTTP_CACHE_MAX_AGE` segundos
+    não são baixadas de novo; as mais antigas são revalidadas com
+    If-None-Match/If-Modified-Since e, em um 304, o texto já limpo é reaproveitado.
+    """
+    # Filtros que dispensam o download
+    if site_bloqueado(link):
+        print(f"Ignorando {link}: site bloqueado")
+        return {"link": link, "conteudo": ""}, True
+    if extensao_ignorada(link):
+        print(f"Ignorando {link}: arquivo que não é página")
+        return {"link": link, "conteudo": ""}, False
+
+    chave = normalizar_url(link)
+    entrada = cache.obter(chave) if cache is not None else None
+    headers = dict(HEADERS_ARTIGO)
+
+    if entrada is not None:
+        texto_valido = entrada["versao_extrator"] == VERSAO_EXTRATOR
+        if texto_valido and time.time() - entrada["validado_em"] < HTTP_CACHE_MAX_AGE:
+            return {"link": link, "conteudo": entrada["conteudo"]}, False
+
+        if entrada["etag"]:
+            headers["If-None-Match"] = entrada["etag"]
+        if entrada["last_modified"]:
+            headers["If-Modified-Since"] = entrada["last_modified"]
+
+    try:
+        response, corpo = _baixar(link, headers, limitador, timeout)
+
+        if response.status_code == 304 and entrada is not None:
+            corpo = base64.b64decode(entrada["corpo"])
+            if entrada["versao_extrator"] == VERSAO_EXTRATOR:
+                conteudo_artigo_limpo = entrada["conteudo"]
+            else:
+                conteudo_artigo_limpo = _extrair_texto(corpo)
+            response.headers.setdefault("ETag", entrada["etag"])
+            response.headers.setdefault("Last-Modified", entrada["last_modified"])
+            _salvar_no_cache(cache, chave, response, corpo, conteudo_artigo_limpo)
+            return {"link": link, "conteudo": conteudo_artigo_limpo}, False
+
+        if corpo is not None:
+            conteudo_artigo_limpo = _extrair_texto(corpo)
+
+            if conteudo_bloqueado(conteudo_artigo_limpo):
+                print(
+                    f"Ignorando {link}: Bloqueio de automação detectado ou requer JavaScript"
+                )
+                transporte.LIMITADOR_HOSTS.registrar_bloqueio(link)
+                return {"link": link, "conteudo": ""}, True
+
+            if cache is not None:
+                _salvar_no_cache(cache, chave, response, corpo, conteudo_artigo_limpo)
+            return {"link": link, "conteudo": conteudo_artigo_limpo}, False
+
+        if response.status_code < 200 or response.status_code >= 300:
+            print(f"Ignorando {link}: Resposta com status code {response.status_code}")
+        return {"link": link, "conteudo": ""}, False
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao acessar {link}: {str(e)}")
+        return {"link": link, "conteudo": ""}, False
+
+
+def extrair_conteudo_links(
+    links,
+    max_workers=MAX_WORKERS,
+    max_por_host=MAX_POR_HOST,
+    descartar_bloqueados=False,
+    timeout=None,
+    cache=CACHE_PAGINAS,
+):
+    """Baixa as notícias em paralelo, mantendo a ordem de `links`.
+
+    `max_workers` limita o total de downloads simultâneos e `max_por_host` o
+    número de downloads simultâneos em um mesmo domínio. Com
+    `descartar_bloqueados=True`, sites bloqueados não são baixados e páginas
+    com bloqueio de automação são omitidas do resultado.
+    """
+    if descartar_bloqueados:
+        links = [link for link in links if not site_bloqueado(link)]
+
+    limitador = LimitadorPorHost(max_por_host)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        resultados = list(
+            executor.map(
+                lambda link: extrair_conteudo_link(link, limitador, timeout, cache),
+                links,
+            )
+        )
+
+    artigos = []
+    for artigo, bloqueado in resultados:
+        if bloqueado and descartar_bloqueados:
+            continue
+        artigos.append(artigo)
+
+    return artigos
+
+
+def gerar_conteudo_links(
+    links,
+    max_workers=MAX_WORKERS,
+    max_por_host=MAX_POR_HOST,
+    descartar_bloqueados=False,
+    timeout=None,
+    cache=CACHE_PAGINAS,
+):
+    """Versão em fluxo de `extrair_conteudo_links`.
+
+    Consome `links` de forma incremental (pode ser um gerador) e produz cada
+    notícia assim que seu download termina, na ordem de conclusão.
+    """
+    limitador = LimitadorPorHost(max_por_host)
+
+    if descartar_bloqueados:
+        links = (link for link in links if not site_bloqueado(link))
+
+    resultados = mapear_em_fluxo(
+        lambda link: extrair_conteudo_link(link, limitador, timeout, cache),
+        links,
+        max_workers=max_workers,
+    )
+    for artigo, bloqueado in resultados:
+        if bloqueado and descartar_bloqueados:
+            continue
+        yield artigo
@@ -0,0 +1,16 @@
+import os
+
+
+def obter(nome, padrao=None):
+    """Lê uma configuração das variáveis de ambiente ou, na falta, de st.secrets."""
+    valor = os.environ.get(nome)
+    if valor is not None:
+        return valor
+
+    try:
+        import streamlit as st
+
+        return st.secrets.get(nome, padrao)
+    except Exception:
+        # Fora do Streamlit ou sem secrets.toml
+        return padrao
@@ -0,0 +1,125 @@
+import hashlib
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+
+# Notícias com assinaturas a até LIMIAR_HAMMING bits de distância são tratadas
+# como a mesma matéria (republicada por outro portal)
+BITS_ASSINATURA = 64
+TAMANHO_SHINGLE = 3
+LIMIAR_HAMMING = 3
+# Textos muito curtos geram assinaturas pouco confiáveis
+MIN_SHINGLES = 20
+
+
+def _shingles(texto):
+    palavras = re.findall(r"\w+", texto.lower())
+    return Counter(
+        " ".join(palavras[i : i + TAMANHO_SHINGLE])
+        for i in range(max(0, len(palavras) - TAMANHO_SHINGLE + 1))
+    )
+
+
+def simhash(texto):
+    """Assinatura SimHash de 64 bits dos shingles de palavras do texto.
+
+    Retorna None quando o texto é curto demais para uma comparação confiável.
+    """
+    shingles = _shingles(texto)
+    if sum(shingles.values()) < MIN_SHINGLES:
+        return None
+
+    pesos = [0] * BITS_ASSINATURA
+    for shingle, contagem in shingles.items():
+        valor = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(BITS_ASSINATURA):
+            pesos[bit] += contagem if valor >> bit & 1 else -contagem
+
+    return sum(1 << bit for bit, peso in enumerate(pesos) if peso > 0)
+
+
+def distancia_hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class AgrupadorDuplicatas:
+    """Agrupa textos quase idênticos, indexando as assinaturas por faixas.
+
+    A assinatura é dividida em LIMIAR_HAMMING + 1 faixas: duas assinaturas a
+    até LIMIAR_HAMMING bits de distância coincidem em pelo menos uma faixa, de
+    modo que só os textos que compartilham alguma faixa precisam ser comparados.
+    """
+
+    def __init__(self, limiar=LIMIAR_HAMMING):
+        self.limiar = limiar
+        self.faixas = limiar + 1
+        self.largura = BITS_ASSINATURA // self.faixas
+        self._indice = defaultdict(list)
+
+    def _chaves_faixas(self, assinatura):
+        mascara = (1 << self.largura) - 1
+        return [
+            (faixa, assinatura >> (faixa * self.largura) & mascara)
+            for faixa in range(self.faixas)
+        ]
+
+    def agrupar(self, chave, texto):
+        """Retorna a chave do representante do grupo de `texto`.
+
+        Se não houver texto parecido já visto, `chave` passa a representar um
+        novo grupo e é ela mesma a retornada.
+        """
+        assinatura = simhash(texto)
+        if assinatura is None:
+            return chave
+
+        chaves_faixas = self._chaves_faixas(assinatura)
+        for chave_faixa in chaves_faixas:
+            for representante, outra in self._indice[chave_faixa]:
+                if distancia_hamming(assinatura, outra) <= self.limiar:
+                    return representante
+
+        for chave_faixa in chaves_faixas:
+            self._indice[chave_faixa].append((chave, assinatura))
+        return chave
+
+
+def classificador_sem_duplicatas(classificar, limiar=LIMIAR_HAMMING):
+    """Envolve `classificar(artigo)` para chamá-lo uma vez por grupo de duplicatas.
+
+    A função retornada pode ser chamada de várias threads. O primeiro artigo de
+    cada grupo é classificado e os demais recebem uma cópia do resultado, com o
+    próprio link e `duplicata_de` apontando para o representante.
+    """
+    agrupador = AgrupadorDuplicatas(limiar)
+    futuros = {}
+    lock = threading.Lock()
+
+    def classificar_artigo(artigo):
+        link = artigo["link"]
+        with lock:
+            representante = agrupador.agrupar(link, artigo["conteudo"])
+            responsavel = representante not in futuros
+            if responsavel:
+                futuros[representante] = Future()
+            futuro = futuros[representante]
+
+        if responsavel:
+            try:
+                futuro.set_result(classificar(artigo))
+            except Exception as erro:
+                futuro.set_exception(erro)
+                raise
+            return futuro.result()
+
+        resultado = dict(futuro.result())
+        if resultado:
+            resultado["link"] = link
+            resultado["duplicata_de"] = representante
+        print(f"{link} é duplicata de {representante}; classificação reaproveitada")
+        return resultado
+
+    return classificar_artigo
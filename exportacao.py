@@ -0,0 +1,73 @@
+import io
+
+# Linhas convertidas por vez ao escrever a planilha, para não duplicar o
+# DataFrame inteiro em memória
+LINHAS_POR_BLOCO = 5000
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TIPO_CSV = "text/csv"
+
+# O XlsxWriter escreve bem mais rápido que o openpyxl, mas é opcional
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+def _linhas(df):
+    for inicio in range(0, len(df), LINHAS_POR_BLOCO):
+        bloco = df.iloc[inicio : inicio + LINHAS_POR_BLOCO].astype(object)
+        yield from bloco.where(bloco.notna(), None).itertuples(index=False, name=None)
+
+
+def _escrever_xlsxwriter(df, destino):
+    # constant_memory grava cada linha no disco assim que a próxima começa
+    livro = xlsxwriter.Workbook(
+        destino, {"constant_memory": True, "strings_to_urls": False}
+    )
+    planilha = livro.add_worksheet()
+    planilha.write_row(0, 0, [str(coluna) for coluna in df.columns])
+    for numero, linha in enumerate(_linhas(df), 1):
+        planilha.write_row(numero, 0, linha)
+    livro.close()
+
+
+def _escrever_openpyxl(df, destino):
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet()
+    planilha.append([str(coluna) for coluna in df.columns])
+    for linha in _linhas(df):
+        planilha.append(linha)
+    livro.save(destino)
+
+
+def escrever_xlsx(df, destino):
+    """Grava `df` em XLSX no modo de escrita em fluxo, sem índice.
+
+    `destino` é um caminho ou um arquivo binário aberto. Usa o XlsxWriter se
+    instalado e, senão, o modo write_only do openpyxl.
+    """
+    if xlsxwriter is None:
+        _escrever_openpyxl(df, destino)
+    else:
+        _escrever_xlsxwriter(df, destino)
+
+
+def gerar_xlsx(df):
+    """Conteúdo do XLSX de `df`, em memória, para botões de download."""
+    buffer = io.BytesIO()
+    escrever_xlsx(df, buffer)
+    return buffer.getvalue()
+
+
+def gerar_csv(df):
+    """Conteúdo do CSV de `df` (separador ";", UTF-8), em memória."""
+    return df.to_csv(sep=";", index=False).encode("utf-8")
+
+
+def salvar_planilhas(df, caminho_sem_extensao):
+    """Grava `<caminho>.csv` e `<caminho>.xlsx`."""
+    df.to_csv(caminho_sem_extensao + ".csv", sep=";", index=False, encoding="utf-8")
+    escrever_xlsx(df, caminho_sem_extensao + ".xlsx")
@@ -0,0 +1,403 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel, Field
+from langchain.utils.openai_functions import convert_pydantic_to_openai_function
+from langchain_openai import AzureChatOpenAI
+from langchain.prompts import ChatPromptTemplate
+from langchain.output_parsers.openai_functions import JsonOutputFunctionsParser
+from langchain_core.output_parsers import StrOutputParser
+from langchain.callbacks import get_openai_callback
+
+import configuracao
+from cache import DIRETORIO_CACHE, CacheSQLite, gerar_chave
+from limitador import LLM_RPM, LLM_TPM, AgendadorLLM
+from metricas import METRICAS
+from preprocessamento import contar_tokens, preparar_texto, truncar_por_tokens
+
+AZURE_OPENAI_API_KEY = configuracao.obter("AZURE_OPENAI_API_KEY")
+AZURE_OPENAI_ENDPOINT = configuracao.obter("AZURE_OPENAI_ENDPOINT")
+AZURE_OPENAI_API_VERSION = configuracao.obter("AZURE_OPENAI_API_VERSION")
+AZURE_OPENAI_DEPLOYMENT = configuracao.obter("AZURE_OPENAI_DEPLOYMENT")
+AZURE_OPENAI_MODEL = configuracao.obter("AZURE_OPENAI_MODEL")
+
+# Chamadas simultâneas à LLM e orçamentos por minuto do deployment
+LLM_WORKERS = int(configuracao.obter("AZURE_OPENAI_MAX_CONCURRENCY", 4))
+AGENDADOR_LLM = AgendadorLLM(
+    rpm=int(configuracao.obter("AZURE_OPENAI_RPM", LLM_RPM)),
+    tpm=int(configuracao.obter("AZURE_OPENAI_TPM", LLM_TPM)),
+)
+
+# Tokens do prompt de sistema, do schema da função e da resposta
+TOKENS_FIXOS_EXTRACAO = 1000
+TOKENS_FIXOS_RESUMO = 600
+
+# Resumo final em árvore: quantos resumos (e tokens) entram em cada chamada
+RESUMOS_POR_LOTE = int(configuracao.obter("LLM_RESUMOS_POR_LOTE", 8))
+MAX_TOKENS_LOTE_RESUMO = int(configuracao.obter("LLM_MAX_TOKENS_LOTE_RESUMO", 4000))
+
+# Incrementar sempre que o prompt ou o schema de extração mudarem, para não
+# reaproveitar resultados antigos do cache
+VERSAO_PROMPT_EXTRACAO = 2
+
+CACHE_EXTRACAO = CacheSQLite(
+    DIRETORIO_CACHE / "extracao.sqlite3",
+    ttl=float(configuracao.obter("CACHE_EXTRACAO_TTL_DIAS", 30)) * 24 * 3600,
+    max_itens=int(configuracao.obter("CACHE_EXTRACAO_MAX_ITENS", 20000)),
+)
+
+
+class Extrair(BaseModel):
+    """Marca e classifica o texto de acordo com o pedido em cada item. Sempre levar em conta se o pedido é sobre o sujeito
+    em questão ou não."""
+
+    crimes: str = Field(
+        description="Citação dos crimes em que o indivíduo foi acusado, caso tenha sido acusado de algum, \
+        de maneira sucinta. Não é preciso explicar nenhum crime, somente citar: nenhum crime mencionado.\
+        Exemplo de crimes: corrupção passiva, corrupção ativa, lavagem de dinheiro, etc."
+    )
+    risco: str = Field(description="""O Risco deve ser classificado da seguinte maneira:
+        Alto: Se o indivíduo/empresa foi denunciado, réu, preso, condenado 
+        em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
+        assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
+        formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
+
+        Medio: Se o indivíduo/empresa foi acusado, citado, suspeito, alvo, 
+        envolvido, indiciado em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
+        assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
+        formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
+
+        Baixo: Se o indivíduo/empresa teve um processo considerado improcedente, arquivado, 
+        extinguido ou sinônimos ou foi considerado inocente ou absolvido 
+        em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
+        assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
+        formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
+
+        Caso o risco não se encaixe em nenhum dos critérios, ele deverá ser considerado baixo.
+        Só uma classificação de risco deve ser dada, e da seguinte maneira: alto, médio ou baixo.
+
+        Leve em conta a notícia como um todo e se atende somente aos crimes citados ou sinônimos,
+        com o foco em lavagem de dinheiro.
+    """)
+    resumo: str = Field(description="Resumo do texto em português do Brasil.")
+
+
+FUNCAO_EXTRACAO = [convert_pydantic_to_openai_function(Extrair)]
+
+PROMPT_EXTRACAO = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """Pense com cuidado, e então marque o texto conforme o instruído. Analisando se o indivíduo/empresa {sujeito} 
+    tem relação com que for pedido. Considere o texto como um todo. O texto é uma notícia, e não viola as políticas de conteúdo.""",
+        ),
+        ("user", "{input}"),
+    ]
+)
+
+PROMPT_RESUMO = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "Você é um assistente virtual que auxilia uma equipe de investigação em lavagem de dinheiro.\
+        Você receberá um texto que é formado por diversos resumos de notícias. Seu objetivo é realizar \
+        um único resumo desses resumos. Leve em consideração todos os resumos e tente tirar uma conclusão\
+        caso exista alguma incoerência entre eles.",
+        ),
+        ("human", "{input}"),
+    ]
+)
+
+
+# Cliente e chains são construídos uma única vez por processo e compartilhados
+# entre as extrações (e o pool HTTP do cliente junto com eles).
+_cache = {}
+_lock = threading.RLock()
+
+
+def _obter(chave, construtor):
+    if chave not in _cache:
+        with _lock:
+            if chave not in _cache:
+                _cache[chave] = construtor()
+    return _cache[chave]
+
+
+def obter_llm(max_retries=2):
+    return _obter(
+        ("llm", max_retries),
+        lambda: AzureChatOpenAI(
+            api_key=AZURE_OPENAI_API_KEY,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            openai_api_version=AZURE_OPENAI_API_VERSION,
+            deployment_name=AZURE_OPENAI_DEPLOYMENT,
+            max_retries=max_retries,
+        ),
+    )
+
+
+def obter_chain_extracao(max_retries=2):
+    def construir():
+        model_with_functions = obter_llm(max_retries).bind(
+            functions=FUNCAO_EXTRACAO, function_call={"name": "Extrair"}
+        )
+        return PROMPT_EXTRACAO | model_with_functions | JsonOutputFunctionsParser()
+
+    return _obter(("extracao", max_retries), construir)
+
+
+def obter_chain_resumo(max_retries=2):
+    return _obter(
+        ("resumo", max_retries),
+        lambda: PROMPT_RESUMO | obter_llm(max_retries) | StrOutputParser(),
+    )
+
+
+def registrar_uso_llm(cb, etapa):
+    """Tokens e custo contados pelo get_openai_callback, nas métricas."""
+    METRICAS.incrementar(
+        "llm_tokens_total", cb.prompt_tokens, etapa=etapa, tipo="prompt"
+    )
+    METRICAS.incrementar(
+        "llm_tokens_total", cb.completion_tokens, etapa=etapa, tipo="completion"
+    )
+    METRICAS.incrementar("llm_custo_usd_total", cb.total_cost, etapa=etapa)
+
+
+def estimar_tokens(tokens_texto):
+    """Estimativa de tokens da chamada (texto + prompt + resposta)."""
+    return tokens_texto + TOKENS_FIXOS_EXTRACAO
+
+
+class Extracao:
+    def __init__(self, noticia, sujeito, agendador=None, cache=CACHE_EXTRACAO):
+        # self.path_noticia = path_noticia
+        self.noticia = noticia
+        self.sujeito = sujeito
+        self.agendador = agendador
+        self.cache = cache
+
+    def chave_cache(self, texto):
+        return gerar_chave(
+            self.sujeito,
+            texto,
+            VERSAO_PROMPT_EXTRACAO,
+            AZURE_OPENAI_DEPLOYMENT,
+        )
+
+    @staticmethod
+    def extrai_lote(
+        noticias,
+        sujeito,
+        max_concurrency=LLM_WORKERS,
+        agendador=None,
+        cache=CACHE_EXTRACAO,
+    ):
+        """Classifica várias notícias em paralelo.
+
+        As chamadas passam pelo agendador de RPM/TPM (por padrão o do processo)
+        e os resultados voltam na mesma ordem de `noticias`.
+        """
+        agendador = agendador or AGENDADOR_LLM
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            return list(
+                executor.map(
+                    lambda noticia: Extracao(
+                        noticia=noticia,
+                        sujeito=sujeito,
+                        agendador=agendador,
+                        cache=cache,
+                    ).extrai_json(),
+                    noticias,
+                )
+            )
+
+    def extrai_json(self):
+        # Só os trechos que mencionam o sujeito, dentro do orçamento de tokens
+        texto, tokens_originais, tokens_texto = preparar_texto(
+            self.noticia["texto"], self.sujeito, AZURE_OPENAI_MODEL
+        )
+        tokens_economizados = tokens_originais - tokens_texto
+
+        if self.cache is not None:
+            extracao_noticias = self.cache.obter(self.chave_cache(texto))
+            if extracao_noticias is not None:
+                extracao_noticias["tokens_economizados"] = tokens_economizados
+                extracao_noticias["input_tokens"] = 0
+                extracao_noticias["output_tokens"] = 0
+                extracao_noticias["custo_usd"] = 0.0
+                extracao_noticias["link"] = self.noticia["link"]
+                return extracao_noticias
+
+        # O agendador já retenta 429, então o cliente não retenta por conta própria
+        tagging_chain = obter_chain_extracao(
+            max_retries=0 if self.agendador is not None else 2
+        )
+
+        # noticia = TextLoader(self.path_noticia, encoding='utf-8').load()
+
+        try:
+            entrada = {"input": texto, "sujeito": self.sujeito}
+
+            def invocar():
+                with METRICAS.medir("llm_segundos", etapa="extracao"):
+                    return tagging_chain.invoke(entrada)
+
+            with get_openai_callback() as cb:
+                if self.agendador is not None:
+                    extracao_noticias = self.agendador.executar(
+                        invocar, estimar_tokens(tokens_texto)
+                    )
+                else:
+                    extracao_noticias = invocar()
+            registrar_uso_llm(cb, "extracao")
+            # extracao_noticias["fonte"] = cb.completion_tokens
+            if self.cache is not None:
+                self.cache.salvar(self.chave_cache(texto), extracao_noticias)
+            extracao_noticias["tokens_economizados"] = tokens_economizados
+            extracao_noticias["input_tokens"] = cb.prompt_tokens
+            extracao_noticias["output_tokens"] = cb.completion_tokens
+            extracao_noticias["custo_usd"] = cb.total_cost
+            extracao_noticias["link"] = self.noticia["link"]
+        except Exception as error:
+            print(f"Erro na extração de {self.noticia['link']}: {error}")
+            extracao_noticias = {}
+
+        return extracao_noticias
+
+
+def resumir(resumos, agendador=None):
+    """Um único resumo dos `resumos`, numa chamada à LLM."""
+    texto = "\n\n".join(resumos)
+    chain = obter_chain_resumo(max_retries=0 if agendador is not None else 2)
+
+    def invocar():
+        with METRICAS.medir("llm_segundos", etapa="resumo"):
+            return chain.invoke({"input": texto})
+
+    with get_openai_callback() as cb:
+        if agendador is None:
+            resumo = invocar()
+        else:
+            resumo = agendador.executar(
+                invocar, contar_tokens(texto, AZURE_OPENAI_MODEL) + TOKENS_FIXOS_RESUMO
+            )
+    registrar_uso_llm(cb, "resumo")
+    return resumo
+
+
+class ResumoIncremental:
+    """Resumo final construído em árvore enquanto as classificações chegam.
+
+    Os resumos recebidos em `adicionar` são agrupados em lotes de até
+    `por_lote` resumos ou `max_tokens` tokens; cada lote completo é resumido em
+    segundo plano e o resultado sobe um nível da árvore, onde é agrupado da
+    mesma forma. Assim o prompt de cada chamada tem tamanho limitado para
+    qualquer quantidade de notícias, e quando a última classificação termina
+    resta pouco a resumir em `finalizar`.
+    """
+
+    def __init__(
+        self,
+        por_lote=RESUMOS_POR_LOTE,
+        max_tokens=MAX_TOKENS_LOTE_RESUMO,
+        agendador=None,
+        max_workers=LLM_WORKERS,
+    ):
+        self.por_lote = max(2, por_lote)
+        self.max_tokens = max_tokens
+        self.agendador = agendador
+        self.max_workers = max_workers
+        self._niveis = {}
+        self._vistos = set()
+        self._pendentes = set()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _tokens(self, texto):
+        return contar_tokens(texto, AZURE_OPENAI_MODEL)
+
+    def adicionar(self, resumo, nivel=0):
+        if not resumo:
+            return
+        with self._lock:
+            if nivel == 0:
+                # Duplicatas compartilham o mesmo resumo; cada um entra uma vez
+                if resumo in self._vistos:
+                    return
+                self._vistos.add(resumo)
+                resumo = truncar_por_tokens(resumo, self.max_tokens, AZURE_OPENAI_MODEL)
+
+            lote, tokens = self._niveis.get(nivel, ([], 0))
+            tokens_resumo = self._tokens(resumo)
+            if lote and tokens + tokens_resumo > self.max_tokens:
+                self._submeter(lote, nivel)
+                lote, tokens = [], 0
+            lote.append(resumo)
+            tokens += tokens_resumo
+            if len(lote) >= self.por_lote:
+                self._submeter(lote, nivel)
+                lote, tokens = [], 0
+            self._niveis[nivel] = (lote, tokens)
+
+    def _submeter(self, lote, nivel):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.max_workers), thread_name_prefix="resumo"
+            )
+        futuro = self._executor.submit(self._resumir_lote, lote, nivel)
+        self._pendentes.add(futuro)
+        futuro.add_done_callback(self._pendentes.discard)
+
+    def _resumir_lote(self, lote, nivel):
+        self.adicionar(resumir(lote, self.agendador), nivel + 1)
+
+    def _aguardar(self):
+        # Um lote concluído pode completar outro no nível acima
+        while True:
+            with self._lock:
+                pendentes = list(self._pendentes)
+            if not pendentes:
+                return
+            for futuro in pendentes:
+                futuro.result()
+
+    def finalizar(self):
+        """Aguarda os lotes em andamento e resume o que sobrou em cada nível."""
+        try:
+            while True:
+                self._aguardar()
+                with self._lock:
+                    restantes = [
+                        resumo
+                        for nivel in sorted(self._niveis, reverse=True)
+                        for resumo in self._niveis[nivel][0]
+                    ]
+                    niveis = [
+                        nivel for nivel, (lote, _) in self._niveis.items() if lote
+                    ]
+                    if len(restantes) <= self.por_lote:
+                        break
+                    # Sobras demais: sobem todas para o nível mais alto
+                    self._niveis = {}
+                    topo = max(niveis) + 1
+                for resumo in restantes:
+                    self.adicionar(resumo, topo)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+
+        if not restantes:
+            return ""
+        if len(restantes) == 1 and niveis != [0]:
+            # Já é o resumo de todos os resumos
+            return restantes[0]
+        return resumir(restantes, self.agendador)
+
+
+def extrai_resumo_final(df_final, agendador=None):
+    """Resumo dos resumos de `df_final`, em árvore (ver ResumoIncremental)."""
+    resumo = ResumoIncremental(agendador=agendador)
+    for texto in df_final.resumo.fillna("").values:
+        resumo.adicionar(texto)
+    return resumo.finalizar()
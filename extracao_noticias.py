@@ -1,57 +1,38 @@
-import json
 import requests
-from bs4 import BeautifulSoup
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
-from urllib.parse import urlparse, parse_qs
 import os
-from datetime import datetime
-import re
+import threading
+import time
+from pathlib import Path
+
+from aquecimento import MODULOS_PIPELINE, aquecer
+from busca import MOTORES
+from exportacao import TIPO_CSV, TIPO_XLSX, gerar_csv, gerar_xlsx
+from metricas import METRICAS, iniciar_servidor
+from resultados import ArmazemResultados, novo_diretorio_execucao
+from tarefas import GERENCIADOR
 
 # Streamlit
 import streamlit as st
-from st_aggrid import AgGrid
-
-# Libs AI
-import openai
-from pydantic import BaseModel, Field
-from langchain.utils.openai_functions import convert_pydantic_to_openai_function
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers.openai_functions import JsonOutputFunctionsParser
-from langchain_core.output_parsers import StrOutputParser
-import os
-from langchain.callbacks import get_openai_callback
-import pandas as pd
-from pathlib import Path
 
-# Variáveis de ambiente AI
-PASTA_RAIZ = Path(__file__).parent
+# langchain, openai, pydantic, pandas e st_aggrid (via extracao, triagem,
+# historico e lote) são importados sob demanda, depois de `carregar_pipeline`
 
-AZURE_OPENAI_API_KEY = st.secrets["AZURE_OPENAI_API_KEY"]
-AZURE_OPENAI_ENDPOINT = st.secrets["AZURE_OPENAI_ENDPOINT"]
-AZURE_OPENAI_API_VERSION = st.secrets["AZURE_OPENAI_API_VERSION"]
-AZURE_OPENAI_DEPLOYMENT = st.secrets["AZURE_OPENAI_DEPLOYMENT"]
-AZURE_OPENAI_MODEL = st.secrets["AZURE_OPENAI_MODEL"]
-AZURE_OPENAI_ADA_EMBEDDING_DEPLOYMENT_NAME = st.secrets[
-    "AZURE_OPENAI_ADA_EMBEDDING_DEPLOYMENT_NAME"
-]
-AZURE_OPENAI_ADA_EMBEDDING_MODEL_NAME = st.secrets[
-    "AZURE_OPENAI_ADA_EMBEDDING_MODEL_NAME"
-]
-
-openai.api_type = "azure"
-openai.api_base = AZURE_OPENAI_ENDPOINT
-openai.api_version = AZURE_OPENAI_API_VERSION
-openai.api_key = AZURE_OPENAI_API_KEY
-
-client = openai.AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+PASTA_RAIZ = Path(__file__).parent
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+# Intervalo, em segundos, entre as atualizações do progresso de uma pesquisa
+INTERVALO_ATUALIZACAO = 2
+
+# Extrações exibidas, no máximo, por uma consulta ao histórico
+LIMITE_HISTORICO = 500
+# Os mesmos valores de triagem.CATEGORIAS_RISCO, sem importar o pipeline
+RISCOS = ["alto", "médio", "baixo"]
+
+# /metrics para o Prometheus, se METRICAS_PORTA estiver configurada
+iniciar_servidor()
+
 ################################################################################################################################
 # UX
 ################################################################################################################################
@@ -64,9 +45,34 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+
+@st.cache_data
+def ler_css():
+    return (PASTA_RAIZ / "styles.css").read_text(encoding="utf-8")
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_aquecimento():
+    """Aquece o processo em segundo plano, sem atrasar a primeira renderização."""
+    thread = threading.Thread(
+        target=aquecer,
+        args=(MODULOS_PIPELINE + ("st_aggrid",),),
+        name="aquecimento",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+@st.cache_resource(show_spinner="Carregando o pipeline de triagem...")
+def carregar_pipeline():
+    """Espera o aquecimento; depois dele, os imports do pipeline são imediatos."""
+    iniciar_aquecimento().join()
+
+
 # Leitura do arquivo CSS de estilização
-with open("./styles.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+st.markdown(f"<style>{ler_css()}</style>", unsafe_allow_html=True)
+iniciar_aquecimento()
 
 
 ################################################################################################################################
@@ -74,280 +80,284 @@ with open("./styles.css") as f:
 ################################################################################################################################
 
 
-def obter_resultados_pesquisa_google(query, start=0):
-    url = f"https://www.google.com/search?q={query}&start={start}"
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/91.0.4472.124 Safari/537.36"
+def highlight_last(x):
+    """
+    highlight the last row in a Series BOLD.
+    """
+    return ["font-weight: bold" if v == x.iloc[-1] else "" for v in x]
+
+
+def executar_pesquisa(
+    tarefa,
+    termo_pesquisa,
+    num_paginas,
+    sujeito,
+    forcar_atualizacao,
+    motores,
+):
+    """Triagem completa, executada em segundo plano por `GERENCIADOR`.
+
+    Cada execução grava em um diretório próprio em output/execucoes. Os tempos
+    por etapa vêm da diferença entre instantâneos de `METRICAS` e, com várias
+    pesquisas simultâneas, incluem também as etapas das outras.
+    """
+    try:
+        return _executar_pesquisa(
+            tarefa, termo_pesquisa, num_paginas, sujeito, forcar_atualizacao, motores
         )
+    finally:
+        METRICAS.salvar()
+
+
+def _executar_pesquisa(
+    tarefa, termo_pesquisa, num_paginas, sujeito, forcar_atualizacao, motores
+):
+    from extracao import AGENDADOR_LLM, CACHE_EXTRACAO, ResumoIncremental
+    from historico import HISTORICO
+    from triagem import consolidar_triagem, executar_triagem, salvar_triagem
+
+    inicio = time.perf_counter()
+    metricas_antes = METRICAS.instantaneo()
+    diretorio_saida = novo_diretorio_execucao()
+    cache_antes = CACHE_EXTRACAO.estatisticas()
+    resumo = ResumoIncremental(agendador=AGENDADOR_LLM)
+    json_saida, df = executar_triagem(
+        termo_pesquisa,
+        num_paginas,
+        sujeito,
+        forcar_atualizacao,
+        motores,
+        progresso=tarefa.registrar,
+        armazem=ArmazemResultados(diretorio_saida),
+        resumo=resumo,
+    )
+    cache_depois = CACHE_EXTRACAO.estatisticas()
+    estatisticas_cache = {
+        chave: cache_depois[chave] - cache_antes[chave] for chave in ["hits", "misses"]
     }
+    print(f"Cache de extrações: {estatisticas_cache}")
 
-    try:
-        response = requests.get(url, headers=headers, verify=False)
-        if response.status_code == 200:
-            return response.content
-        else:
-            print(f"Erro ao fazer a requisição. Status code: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Erro ao fazer a requisição: {e}")
+    if df.empty:
         return None
 
+    df, json_final = consolidar_triagem(df, resumo)
+    # df = df.append(json_final, ignore_index=True)
+    # df.style.apply(highlight_last)
+    salvar_triagem(diretorio_saida, df, json_final)
+    print(f"Resultados salvos em '{diretorio_saida}'.")
+
+    comparacao = HISTORICO.comparar(sujeito, df)
+    HISTORICO.registrar_triagem(sujeito, df, json_final, diretorio_saida)
+
+    return {
+        "termo_pesquisa": termo_pesquisa,
+        "sujeito": sujeito,
+        "data_pesquisa": json_saida["Data de Pesquisa"],
+        "diretorio_saida": diretorio_saida,
+        "estatisticas_cache": estatisticas_cache,
+        "df": df,
+        "json_final": json_final,
+        "comparacao": comparacao,
+        "duracao": time.perf_counter() - inicio,
+        "metricas": METRICAS.resumo_execucao(
+            metricas_antes, manter_rotulos=("etapa", "motor")
+        ),
+    }
 
-def parsear_html_resultados_pesquisa(html_content, num_links):
-    if html_content:
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        result_divs = soup.find_all("div", class_="g")
 
-        links_unicos = set()
-        count = 0
+def exibir_metricas(resultado):
+    import pandas as pd
 
-        for div in result_divs:
-            if count >= num_links:
-                break
+    etapas, contadores = resultado["metricas"]
+    st.markdown(f"Duração total: {resultado['duracao']:.1f} s")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "etapa": " ".join([etapa["etapa"], *etapa["rotulos"].values()]),
+                    "chamadas": etapa["quantidade"],
+                    "total_s": round(etapa["total_s"], 2),
+                    "media_ms": round(etapa["media_s"] * 1000),
+                    "p95_ms": etapa["p95_s"] * 1000,
+                }
+                for etapa in etapas
+            ]
+        ),
+        hide_index=True,
+    )
 
-            link_tag = div.find("a", href=True)
-            if link_tag:
-                url = link_tag["href"]
+    def soma(nome, **rotulos):
+        return sum(
+            valor
+            for (contador, chaves), valor in contadores.items()
+            if contador == nome and set(rotulos.items()) <= set(chaves)
+        )
 
-                if url.startswith("/url?q="):
-                    parsed_url = parse_qs(urlparse(url).query)
-                    url = parsed_url.get("q", [None])[0]
+    st.caption(
+        f"Tokens: {soma('llm_tokens_total', tipo='prompt')} de prompt, "
+        f"{soma('llm_tokens_total', tipo='completion')} de resposta | "
+        f"Custo estimado: US$ {soma('llm_custo_usd_total'):.4f} | "
+        f"Baixados: {soma('download_bytes_total') / 2**20:.1f} MB | "
+        f"Cache: {soma('cache_consultas_total', resultado='hit')} hits, "
+        f"{soma('cache_consultas_total', resultado='miss')} misses"
+    )
 
-                if url and urlparse(url).scheme in ["http", "https"]:
-                    links_unicos.add(url)
-                    count += 1
 
-        return list(links_unicos)
+@st.experimental_fragment(run_every=INTERVALO_ATUALIZACAO)
+def acompanhar_tarefa(id_tarefa):
+    """Mostra o progresso e os resultados parciais até a tarefa terminar."""
+    tarefa = GERENCIADOR.obter(id_tarefa)
+    if tarefa is None or tarefa.finalizada:
+        # Redesenha a página inteira, que passa a exibir o resultado
+        st.rerun()
+
+    estado = tarefa.instantaneo()
+    contadores = estado["contadores"]
+    st.markdown(f"**Pesquisando:** {estado['descricao']} ({estado['estado']})")
+    if estado["total"]:
+        # Lote: um evento "sujeitos" por sujeito concluído
+        concluidos = contadores.get("sujeitos", 0)
+        st.progress(
+            concluidos / estado["total"],
+            text=f"{concluidos} de {estado['total']} sujeitos "
+            f"({estado['duracao']:.0f} s)",
+        )
     else:
-        return []
+        colunas = st.columns(4)
+        colunas[0].metric("Links encontrados", contadores.get("links", 0))
+        colunas[1].metric("Notícias baixadas", contadores.get("artigos", 0))
+        colunas[2].metric("Notícias classificadas", contadores.get("classificados", 0))
+        colunas[3].metric("Tempo", f"{estado['duracao']:.0f} s")
+    if estado["parciais"]:
+        import pandas as pd
 
+        st.dataframe(pd.DataFrame(estado["parciais"]), use_container_width=True)
 
-def obter_links_de_varias_paginas(query, num_paginas, num_links_por_pagina=10):
-    todos_os_links = set()
 
-    for pagina in range(num_paginas):
-        start = (
-            pagina * 10
-        )  # Google usa start=0 para a primeira página, start=10 para a segunda, etc.
-        html_content = obter_resultados_pesquisa_google(query, start=start)
-        novos_links = parsear_html_resultados_pesquisa(
-            html_content, num_links_por_pagina
-        )
+def consultar_triagem_anterior(sujeito):
+    """Última triagem do sujeito no histórico, com as suas `extracoes`, ou None."""
+    from historico import HISTORICO
 
-        if novos_links:
-            todos_os_links.update(novos_links)
-        else:
-            print(f"Sem resultados na página {pagina + 1}. Parando a busca.")
-            break  # Interrompe a busca se não encontrar novos resultados.
-
-    return list(todos_os_links)
-
-
-def extrair_conteudo_links(links):
-    artigos = []
-    for link in links:
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-            }
-            response = requests.get(link, verify=False, headers=headers)
-
-            if response.status_code >= 200 and response.status_code < 300:
-                soup = BeautifulSoup(response.content, "html.parser")
-
-                conteudo_artigo = " ".join(
-                    [
-                        p.get_text()
-                        for p in soup.find_all(
-                            ["p", "div", "span", "article", "section"]
-                        )
-                    ]
-                )
-
-                conteudo_artigo_limpo = limpar_conteudo(conteudo_artigo)
-
-                palavras_bloqueio = [
-                    "enable javascript",
-                    "ativar javascript",
-                    "automated requests",
-                    "captcha",
-                    "verify you are human",
-                    "zscaler to protect",
-                ]
-                site_bloqueio = [
-                    "google.com",
-                    "google.se",
-                    "youtube.com",
-                    "facebook.com",
-                    "instagram.com",
-                    "transfermarkt.co",
-                    "twitter.com",
-                    "tiktok.com",
-                    "linkedin.com",
-                    "wikipedia.org",
-                ]
-
-                # bloqueio_detectado = False
-                bloqueio_detectado = any(
-                    palavra in conteudo_artigo_limpo.lower()
-                    for palavra in palavras_bloqueio
-                ) or any(site in link for site in site_bloqueio)
-
-                if not bloqueio_detectado:
-                    artigos.append({"link": link, "conteudo": conteudo_artigo_limpo})
-                else:
-                    print(
-                        f"Ignorando {link}: Bloqueio de automação detectado ou requer JavaScript"
-                    )
-                    artigos.append({"link": link, "conteudo": ""})
-            else:
-                print(
-                    f"Ignorando {link}: Resposta com status code {response.status_code}"
-                )
-                artigos.append({"link": link, "conteudo": ""})  #
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao acessar {link}: {str(e)}")
-            artigos.append({"link": link, "conteudo": ""})
-
-    return artigos
-
-
-def limpar_conteudo(conteudo):
-    conteudo_limpo = conteudo.replace("\\", "").replace("\n", "").replace("\r", " ")
-    conteudo_limpo = re.sub(" +", " ", conteudo_limpo)
-
-    return conteudo_limpo.strip()
-
-
-class Extracao:
-    def __init__(self, noticia, sujeito):
-        # self.path_noticia = path_noticia
-        self.noticia = noticia
-        self.sujeito = sujeito
-
-    def extrai_json(self):
-        llm = AzureChatOpenAI(
-            openai_api_version=AZURE_OPENAI_API_VERSION,
-            deployment_name=AZURE_OPENAI_DEPLOYMENT,
-        )
+    anterior = HISTORICO.ultima_triagem(sujeito)
+    if anterior is None:
+        return None
+    return {**anterior, "extracoes": HISTORICO.extracoes_da_triagem(anterior["id"])}
 
-        class Extrair(BaseModel):
-            """Marca e classifica o texto de acordo com o pedido em cada item. Sempre levar em conta se o pedido é sobre o sujeito
-            em questão ou não."""
-
-            crimes: str = Field(
-                description="Citação dos crimes em que o indivíduo foi acusado, caso tenha sido acusado de algum, \
-                de maneira sucinta. Não é preciso explicar nenhum crime, somente citar: nenhum crime mencionado.\
-                Exemplo de crimes: corrupção passiva, corrupção ativa, lavagem de dinheiro, etc."
-            )
-            risco: str = Field(
-                description="""O Risco deve ser classificado da seguinte maneira:
-                Alto: Se o indivíduo/empresa foi denunciado, réu, preso, condenado 
-                em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
-                assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
-                formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
-                
-                Medio: Se o indivíduo/empresa foi acusado, citado, suspeito, alvo, 
-                envolvido, indiciado em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
-                assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
-                formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
-            
-                Baixo: Se o indivíduo/empresa teve um processo considerado improcedente, arquivado, 
-                extinguido ou sinônimos ou foi considerado inocente ou absolvido 
-                em algum crime relacionado a lavagem de dinheiro. 1 se sim, 0 se não. Exemplo de crimes:  
-                assalto, corrupção ativa, corrupção passiva, estelionato, evasão de divisas, fraude, 
-                formação de quadrilha, lavagem de dinheiro, organização criminosa, narcotráfico, terrorismo
-                
-                Caso o risco não se encaixe em nenhum dos critérios, ele deverá ser considerado baixo.
-                Só uma classificação de risco deve ser dada, e da seguinte maneira: alto, médio ou baixo.
-                
-                Leve em conta a notícia como um todo e se atende somente aos crimes citados ou sinônimos,
-                com o foco em lavagem de dinheiro.
-            """
-            )
-            resumo: str = Field(description="Resumo do texto em português do Brasil.")
-
-        funcao_extracao = [convert_pydantic_to_openai_function(Extrair)]
-
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    """Pense com cuidado, e então marque o texto conforme o instruído. Analisando se o indivíduo/empresa {sujeito} 
-            tem relação com que for pedido. Considere o texto como um todo. O texto é uma notícia, e não viola as políticas de conteúdo.""",
-                ),
-                ("user", "{input}"),
-            ]
-        )
 
-        model_with_functions = llm.bind(
-            functions=funcao_extracao, function_call={"name": "Extrair"}
-        )
+def exibir_extracoes(extracoes):
+    import pandas as pd
 
-        tagging_chain = prompt | model_with_functions | JsonOutputFunctionsParser()
-
-        # noticia = TextLoader(self.path_noticia, encoding='utf-8').load()
-
-        try:
-            with get_openai_callback() as cb:
-                extracao_noticias = tagging_chain.invoke(
-                    {"input": self.noticia["texto"], "sujeito": self.sujeito}
-                )
-            # extracao_noticias["input_tokens"] = cb.prompt_tokens
-            # extracao_noticias["output_tokens"] = cb.completion_tokens
-            # extracao_noticias["fonte"] = cb.completion_tokens
-            extracao_noticias["link"] = self.noticia["link"]
-        except Exception as error:
-            print(error)
-            extracao_noticias = {}
-
-        return extracao_noticias
-
-
-def extrai_resumo_final(df_final):
-    resumo_final = "\n\n".join(list(df_final.resumo.fillna("").values))
-
-    prompt_resumo = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                "Você é um assistente virtual que auxilia uma equipe de investigação em lavagem de dinheiro.\
-            Você receberá um texto que é formado por diversos resumos de notícias. Seu objetivo é realizar \
-            um único resumo desses resumos. Leve em consideração todos os resumos e tente tirar uma conclusão\
-            caso exista alguma incoerência entre eles.",
-            ),
-            ("human", "{input}"),
-        ]
+    colunas = ["data_consulta", "risco", "crimes", "resumo", "link"]
+    st.dataframe(
+        pd.DataFrame(extracoes, columns=colunas),
+        hide_index=True,
+        use_container_width=True,
     )
 
-    llm = AzureChatOpenAI(
-        openai_api_version=AZURE_OPENAI_API_VERSION,
-        deployment_name=AZURE_OPENAI_DEPLOYMENT,
+
+def exibir_triagem_anterior(anterior):
+    st.markdown(
+        f"**Triagem anterior ({anterior['data_consulta']}):** "
+        f"risco {anterior['risco']}"
     )
+    if anterior["resumo"]:
+        st.markdown(anterior["resumo"])
+    exibir_extracoes(anterior["extracoes"])
+
+
+def consultar_historico():
+    """Consulta as extrações do histórico por sujeito, link, risco e período."""
+    colunas = st.columns(4)
+    sujeito = colunas[0].text_input("Sujeito", key="historico_sujeito")
+    link = colunas[1].text_input("Link", key="historico_link")
+    risco = colunas[2].selectbox("Risco", [""] + RISCOS, key="historico_risco")
+    periodo = colunas[3].date_input("Período", value=(), key="historico_periodo")
+    if st.button("Consultar histórico"):
+        carregar_pipeline()
+        from historico import HISTORICO
+
+        inicio, fim = (list(periodo) + [None, None])[:2]
+        extracoes = HISTORICO.consultar(
+            sujeito=sujeito or None,
+            link=link or None,
+            risco=risco or None,
+            inicio=inicio,
+            fim=fim or inicio,
+            limite=LIMITE_HISTORICO,
+        )
+        if extracoes:
+            exibir_extracoes(extracoes)
+        else:
+            st.info("Nenhuma extração encontrada no histórico.")
 
-    chain_resumo = prompt_resumo | llm | StrOutputParser()
 
-    return chain_resumo.invoke({"input": resumo_final})
+def exibir_resultado(resultado):
+    carregar_pipeline()
+    from st_aggrid import AgGrid
+    from triagem import crimes_unicos
 
+    df = resultado["df"]
+    json_final = resultado["json_final"]
+    estatisticas_cache = resultado["estatisticas_cache"]
 
-def risco_final(df_final):
-    riscos = df_final["risco"].str.lower().values.tolist()
-    if "alto" in riscos:
-        return "alto"
-    if "medio" in riscos:
-        return "medio"
-    return "baixo"
+    st.caption(
+        f"Cache de extrações: {estatisticas_cache['hits']} hits, "
+        f"{estatisticas_cache['misses']} misses | "
+        f"Tokens economizados: {int(df['tokens_economizados'].fillna(0).sum())}"
+    )
 
+    st.markdown("**Consulta Realizada:**")
+    st.markdown(resultado["termo_pesquisa"])
 
-def highlight_last(x):
-    """
-    highlight the last row in a Series BOLD.
-    """
-    return ["font-weight: bold" if v == x.iloc[-1] else "" for v in x]
+    st.markdown("**Resumo das notícias:**")
+    st.markdown(json_final["resumo"])
+
+    st.markdown("**Risco do Cliente:**")
+    st.markdown(json_final["risco"])
+
+    st.markdown("**Crimes que possam ter relação com as notícias:**")
+    crimes = ", ".join(crimes_unicos(df))
+    st.markdown(crimes.lstrip(", "))
+
+    comparacao = resultado["comparacao"]
+    if comparacao is not None:
+        anterior = comparacao["anterior"]
+        st.markdown(
+            f"**Comparação com a triagem de {anterior['data_consulta']}** "
+            f"(risco anterior: {anterior['risco']}):"
+        )
+        st.markdown(
+            f"{len(comparacao['novos'])} notícias novas, "
+            f"{len(comparacao['ausentes'])} não encontradas desta vez, "
+            f"{len(comparacao['mudancas_risco'])} com risco alterado."
+        )
+        with st.expander("Diferenças em relação à triagem anterior"):
+            for link in comparacao["novos"]:
+                st.markdown(f"- Nova: {link}")
+            for link, risco_anterior, risco_atual in comparacao["mudancas_risco"]:
+                st.markdown(f"- Risco {risco_anterior} → {risco_atual}: {link}")
+            for link in comparacao["ausentes"]:
+                st.markdown(f"- Ausente: {link}")
+
+    with st.expander("Tempos da execução"):
+        exibir_metricas(resultado)
+
+    st.markdown("**Detalhes planilhados:**")
+    AgGrid(df)
+
+    # Gerados em memória uma vez por resultado, e não a cada reexecução da página
+    if "xlsx" not in resultado:
+        resultado["xlsx"] = gerar_xlsx(df)
+        resultado["csv"] = gerar_csv(df)
+
+    nome_arquivo = f"{resultado['sujeito']}_{resultado['data_pesquisa']}"
+    colunas = st.columns(2)
+    colunas[0].download_button(
+        "Download Excel", resultado["xlsx"], f"{nome_arquivo}.xlsx", mime=TIPO_XLSX
+    )
+    colunas[1].download_button(
+        "Download CSV", resultado["csv"], f"{nome_arquivo}.csv", mime=TIPO_CSV
+    )
 
 
 def main():
@@ -355,138 +365,140 @@ def main():
     termo_pesquisa = st.text_input("Digite o termo de pesquisa")
     sujeito = termo_pesquisa
     # num_links = 80
-    num_paginas = st.text_input("Digite a quantidade de páginas pesquisadas no Google")
-
-    diretorio_saida = os.path.join(PASTA_RAIZ, "output")
-    if not os.path.exists(diretorio_saida):
-        os.makedirs(diretorio_saida)
+    num_paginas = st.text_input("Digite a quantidade de páginas pesquisadas")
+    motores = st.multiselect(
+        "Motores de busca",
+        list(MOTORES),
+        default=["google"],
+        help="Com mais de um motor, os resultados são combinados sem repetições.",
+    )
+    forcar_atualizacao = st.checkbox(
+        "Forçar atualização da pesquisa",
+        help="Ignora os resultados de pesquisa guardados em cache.",
+    )
 
     if st.button("Iniciar pesquisa"):
-        with st.spinner("Pesquisando..."):
-            # html_resultados = obter_resultados_pesquisa_google(termo_pesquisa)
-            links = obter_links_de_varias_paginas(termo_pesquisa, int(num_paginas))
-
-            # Obter os links
-            if links:
-                # links = parsear_html_resultados_pesquisa(html_resultados, num_links)
-                print(f"Total de links obtidos: {len(links)}")
-
-                # Extrair conteúdo dos links obtidos
-                artigos = extrair_conteudo_links(links)
-                print("=" * 50)
-                for artigo in artigos:
-                    print(f"Link: {artigo['link']}")
-                    print(f"Conteúdo: {artigo['conteudo']}")
-                    print("=" * 50)
-
-                # Gerar o JSON
-                json_saida = {}
-                json_saida["Consulta"] = sujeito
-                json_saida["Data de Pesquisa"] = datetime.now().strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-                for idx, artigo in enumerate(artigos, 1):
-                    json_saida[f"link{idx}"] = {
-                        "link": artigo["link"],
-                        "texto": artigo["conteudo"],
-                    }
-
-                # Salvar o JSON
-                arquivo_saida = os.path.join(diretorio_saida, "output.json")
-                with open(arquivo_saida, "w", encoding="utf-8") as f:
-                    json.dump(json_saida, f, ensure_ascii=False, indent=4)
-
-                print(f"JSON gerado com sucesso e salvo em '{arquivo_saida}'.")
-
-        with st.spinner("Planilhando resultados..."):
-            noticias = json_saida
-            df = pd.DataFrame(
-                columns=[
-                    "crimes",
-                    "risco",
-                    "resumo",
-                    # "input_tokens",
-                    # "output_tokens",
-                    # "fonte",
-                    "link",
-                    "data_consulta",
-                ]
-            )
-            for link in list(noticias.keys())[2:]:
-                print(link)
-                extracao1 = Extracao(
-                    noticia=noticias[link], sujeito=noticias["Consulta"]
-                )
-                extracao1_json = extracao1.extrai_json()
-                extracao1_json["data_consulta"] = noticias["Data de Pesquisa"]
-
-                df = pd.concat([df, pd.DataFrame([extracao1_json])], ignore_index=True)
-                # df = df.append(extracao1_json, ignore_index=True)
-                arquivo_saida = os.path.join(diretorio_saida, "extracao.csv")
-            # df.to_csv(arquivo_saida, sep = ';', index=False)
-
-            # Ordenar por riscos
-            # Definindo a ordem personalizada para a coluna 'Prioridade'
-            ordem_prioridade = pd.Categorical(
-                df["risco"], categories=["alto", "médio", "baixo"], ordered=True
-            )
-
-            # Aplicando a ordem ao DataFrame e ordenando
-            df["risco"] = ordem_prioridade
-            df = df.sort_values("risco")
-
-            # Resumo final
-            json_final = {}
-            json_final["crimes"] = "Resultado da análise:"
-            json_final["resumo"] = extrai_resumo_final(df_final=df)
-            json_final["risco"] = risco_final(df_final=df)
-            # df = df.append(json_final, ignore_index=True)
-            # df.style.apply(highlight_last)
-
-            csv_exportar = df.to_csv(
-                arquivo_saida, sep=";", index=False, encoding="utf-8"
-            )
-            df.to_excel(f"{diretorio_saida}\extracao.xlsx", index=False)
-
-        arquivo_saida = os.path.join(diretorio_saida, "output_final.json")
-        with open(arquivo_saida, "w", encoding="utf-8") as f:
-            json.dump(json_final, f, ensure_ascii=False, indent=4)
-
-        #### Display na tela ####
-        st.markdown("**Consulta Realizada:**")
-        st.markdown(termo_pesquisa)
-
-        st.markdown("**Resumo das notícias:**")
-        st.markdown(json_final["resumo"])
-
-        st.markdown("**Risco do Cliente:**")
-        st.markdown(json_final["risco"])
-
-        st.markdown("**Crimes que possam ter relação com as notícias:**")
-
-        crimes_lista = df["crimes"].tolist()
-        crimes_lista = [
-            crime for crime in crimes_lista if pd.notna(crime)
-        ]  # drop "nan" items
-        print("Crimes lista: ", crimes_lista)
-        crimes_individuais = [
-            crime.strip() for lista in crimes_lista for crime in lista.split(",")
-        ]
-        print("Crimes individuais: ", crimes_individuais)
-        crimes_unicos = set(
-            [crime for crime in crimes_individuais if "nenhum" not in crime.lower()]
+        carregar_pipeline()
+        # Consultado antes de submeter, para não pegar a triagem que vai começar
+        st.session_state["anterior"] = consultar_triagem_anterior(sujeito)
+        id_tarefa = GERENCIADOR.submeter(
+            lambda tarefa: executar_pesquisa(
+                tarefa,
+                termo_pesquisa,
+                int(num_paginas),
+                sujeito,
+                forcar_atualizacao,
+                motores or ["google"],
+            ),
+            descricao=termo_pesquisa,
         )
-        print("Crimes únicos: ", crimes_unicos)
-        resultado = ", ".join(sorted(crimes_unicos))
-        st.markdown(resultado.lstrip(", "))
+        # Na URL, para que um recarregamento da página reencontre a tarefa
+        st.session_state["tarefa"] = id_tarefa
+        st.query_params["tarefa"] = id_tarefa
+
+    id_tarefa = st.session_state.get("tarefa") or st.query_params.get("tarefa")
+    tarefa = GERENCIADOR.obter(id_tarefa) if id_tarefa else None
+    if tarefa is not None:
+        if not tarefa.finalizada:
+            acompanhar_tarefa(id_tarefa)
+        elif tarefa.erro:
+            st.error(f"A pesquisa falhou: {tarefa.erro}")
+        elif tarefa.resultado is None:
+            st.warning("Nenhum resultado encontrado para a pesquisa.")
+        else:
+            exibir_resultado(tarefa.resultado)
+
+        # Os achados anteriores aparecem já durante a nova triagem
+        anterior = st.session_state.get("anterior")
+        if anterior is not None:
+            with st.expander(
+                "Achados da triagem anterior", expanded=not tarefa.finalizada
+            ):
+                exibir_triagem_anterior(anterior)
+
+    with st.expander("Consultar histórico"):
+        consultar_historico()
+
+    with st.expander("Triagem em lote"):
+        triagem_em_lote(num_paginas, motores or ["google"])
+
+
+def executar_lote(tarefa, sujeitos, diretorio_lote, num_paginas, motores):
+    """Triagem em lote, executada em segundo plano por `GERENCIADOR`."""
+    import lote
+
+    registros = []
+    try:
+        for registro in lote.gerar_lote(sujeitos, diretorio_lote, num_paginas, motores):
+            registros.append(registro)
+            tarefa.registrar("sujeitos", registro)
+    finally:
+        METRICAS.salvar()
+
+    return {
+        "diretorio_lote": diretorio_lote,
+        "df": lote.salvar_relatorio_consolidado(diretorio_lote, registros),
+    }
 
-        st.markdown("**Detalhes planilhados:**")
-        AgGrid(df)
 
-        with open(f"{diretorio_saida}\extracao.xlsx", "rb") as f:
-            st.download_button(
-                "Download Excel", f, f"{sujeito}_{noticias['Data de Pesquisa']}.xlsx"
-            )
+def exibir_resultado_lote(resultado):
+    carregar_pipeline()
+    import lote
+    from st_aggrid import AgGrid
+
+    AgGrid(resultado["df"])
+    # Gerado em memória uma vez por resultado, e não a cada reexecução da página
+    if "xlsx" not in resultado:
+        resultado["xlsx"] = gerar_xlsx(resultado["df"])
+    st.download_button(
+        "Download relatório consolidado",
+        resultado["xlsx"],
+        f"{lote.ARQUIVO_CONSOLIDADO}.xlsx",
+        mime=TIPO_XLSX,
+    )
+
+
+def triagem_em_lote(num_paginas, motores):
+    arquivo = st.file_uploader(
+        "Planilha de sujeitos (CSV ou XLSX)",
+        type=["csv", "xlsx"],
+        help="Um sujeito por linha, na coluna 'sujeito' ou na primeira coluna.",
+    )
+    cabecalho = st.checkbox("A primeira linha é o cabeçalho", value=True)
+    if arquivo is not None and st.button("Iniciar triagem em lote"):
+        carregar_pipeline()
+        import lote
+
+        sujeitos = lote.ler_sujeitos(arquivo, arquivo.name, cabecalho)
+        if not sujeitos:
+            st.warning("Nenhum sujeito encontrado na planilha.")
+            return
+
+        # O mesmo arquivo reenviado retoma o lote de onde parou
+        diretorio_lote = lote.diretorio_do_lote(
+            os.path.join(PASTA_RAIZ, "output", "lotes"), arquivo.getvalue()
+        )
+        id_tarefa = GERENCIADOR.submeter(
+            lambda tarefa: executar_lote(
+                tarefa, sujeitos, diretorio_lote, int(num_paginas or 1), motores
+            ),
+            descricao=f"lote {arquivo.name}",
+            total=len(sujeitos),
+        )
+        st.session_state["tarefa_lote"] = id_tarefa
+        st.query_params["tarefa_lote"] = id_tarefa
+
+    id_tarefa = st.session_state.get("tarefa_lote") or st.query_params.get(
+        "tarefa_lote"
+    )
+    tarefa = GERENCIADOR.obter(id_tarefa) if id_tarefa else None
+    if tarefa is not None:
+        if not tarefa.finalizada:
+            acompanhar_tarefa(id_tarefa)
+        elif tarefa.erro:
+            st.error(f"A triagem em lote falhou: {tarefa.erro}")
+        else:
+            exibir_resultado_lote(tarefa.resultado)
 
 
 if __name__ == "__main__":
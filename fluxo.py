@@ -0,0 +1,40 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_FIM = object()
+
+
+class _ErroEntrada:
+    def __init__(self, erro):
+        self.erro = erro
+
+
+def mapear_em_fluxo(funcao, itens, max_workers=1):
+    """Aplica `funcao` a cada item de `itens` assim que ele é produzido.
+
+    O iterável de entrada é consumido em uma thread própria, de modo que um
+    estágio anterior lento (ex.: paginação da pesquisa) não impede que os
+    resultados já prontos sejam entregues. Os resultados são produzidos na
+    ordem em que ficam prontos, não na ordem de entrada.
+    """
+    fila = queue.Queue()
+
+    def alimentar():
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            try:
+                for item in itens:
+                    executor.submit(funcao, item).add_done_callback(fila.put)
+            except Exception as erro:
+                fila.put(_ErroEntrada(erro))
+        fila.put(_FIM)
+
+    threading.Thread(target=alimentar, daemon=True).start()
+
+    while True:
+        resultado = fila.get()
+        if resultado is _FIM:
+            break
+        if isinstance(resultado, _ErroEntrada):
+            raise resultado.erro
+        yield resultado.result()
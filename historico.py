@@ -0,0 +1,254 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import configuracao
+from preprocessamento import normalizar
+from urls import normalizar_url
+
+CAMINHO_HISTORICO = Path(
+    configuracao.obter(
+        "HISTORICO_ARQUIVO", Path(__file__).parent / "output" / "historico.sqlite3"
+    )
+)
+
+COLUNAS_HISTORICO = [
+    "crimes",
+    "risco",
+    "resumo",
+    "link",
+    "data_consulta",
+    "duplicata_de",
+]
+
+
+def normalizar_sujeito(sujeito):
+    """Sujeito sem acentos, em minúsculas e com espaços simples, para comparação."""
+    return " ".join(normalizar(sujeito).split())
+
+
+def _valor(valor):
+    return None if valor is None or pd.isna(valor) else str(valor)
+
+
+class HistoricoTriagens:
+    """Histórico persistente de triagens e extrações em SQLite, com índices.
+
+    Cada triagem registra o resultado consolidado e uma linha por notícia
+    classificada, consultáveis por sujeito, link, risco e intervalo de datas.
+    Datas são guardadas como texto "AAAA-MM-DD HH:MM:SS", que ordena
+    cronologicamente.
+    """
+
+    def __init__(self, caminho=CAMINHO_HISTORICO):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(
+            str(self.caminho), check_same_thread=False, isolation_level=None
+        )
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS triagens (
+                id INTEGER PRIMARY KEY,
+                sujeito TEXT NOT NULL,
+                sujeito_normalizado TEXT NOT NULL,
+                data_consulta TEXT NOT NULL,
+                risco TEXT,
+                resumo TEXT,
+                diretorio TEXT
+            );
+            CREATE TABLE IF NOT EXISTS extracoes (
+                id INTEGER PRIMARY KEY,
+                triagem_id INTEGER NOT NULL REFERENCES triagens (id),
+                sujeito_normalizado TEXT NOT NULL,
+                link TEXT,
+                link_canonico TEXT,
+                crimes TEXT,
+                risco TEXT,
+                resumo TEXT,
+                data_consulta TEXT NOT NULL,
+                duplicata_de TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_triagens_sujeito
+                ON triagens (sujeito_normalizado, data_consulta);
+            CREATE INDEX IF NOT EXISTS idx_extracoes_triagem
+                ON extracoes (triagem_id);
+            CREATE INDEX IF NOT EXISTS idx_extracoes_sujeito
+                ON extracoes (sujeito_normalizado, data_consulta);
+            CREATE INDEX IF NOT EXISTS idx_extracoes_link
+                ON extracoes (link_canonico);
+            CREATE INDEX IF NOT EXISTS idx_extracoes_risco
+                ON extracoes (risco, data_consulta);
+            CREATE INDEX IF NOT EXISTS idx_extracoes_data
+                ON extracoes (data_consulta);
+            """)
+
+    def registrar_triagem(
+        self, sujeito, df, json_final=None, diretorio=None, data_consulta=None
+    ):
+        """Grava uma triagem e suas extrações numa única transação; retorna o id."""
+        json_final = json_final or {}
+        if data_consulta is None:
+            datas = df["data_consulta"].dropna() if "data_consulta" in df else []
+            data_consulta = (
+                datas.iloc[0]
+                if len(datas)
+                else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            )
+        sujeito_normalizado = normalizar_sujeito(sujeito)
+
+        linhas = []
+        for registro in df.reindex(columns=COLUNAS_HISTORICO).to_dict("records"):
+            link = _valor(registro["link"])
+            linhas.append(
+                (
+                    sujeito_normalizado,
+                    link,
+                    normalizar_url(link) if link else None,
+                    _valor(registro["crimes"]),
+                    _valor(registro["risco"]),
+                    _valor(registro["resumo"]),
+                    _valor(registro["data_consulta"]) or data_consulta,
+                    _valor(registro["duplicata_de"]),
+                )
+            )
+
+        with self._lock:
+            self._conexao.execute("BEGIN")
+            try:
+                cursor = self._conexao.execute(
+                    """
+                    INSERT INTO triagens (
+                        sujeito, sujeito_normalizado, data_consulta, risco,
+                        resumo, diretorio
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        sujeito,
+                        sujeito_normalizado,
+                        data_consulta,
+                        json_final.get("risco"),
+                        json_final.get("resumo"),
+                        _valor(diretorio),
+                    ),
+                )
+                triagem_id = cursor.lastrowid
+                self._conexao.executemany(
+                    """
+                    INSERT INTO extracoes (
+                        triagem_id, sujeito_normalizado, link, link_canonico,
+                        crimes, risco, resumo, data_consulta, duplicata_de
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [(triagem_id, *linha) for linha in linhas],
+                )
+                self._conexao.execute("COMMIT")
+            except Exception:
+                self._conexao.execute("ROLLBACK")
+                raise
+        return triagem_id
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return [dict(linha) for linha in self._conexao.execute(sql, parametros)]
+
+    def ultima_triagem(self, sujeito, antes_de=None):
+        """Triagem mais recente do sujeito (opcionalmente anterior a `antes_de`)."""
+        sql = "SELECT * FROM triagens WHERE sujeito_normalizado = ?"
+        parametros = [normalizar_sujeito(sujeito)]
+        if antes_de is not None:
+            sql += " AND data_consulta < ?"
+            parametros.append(antes_de)
+        sql += " ORDER BY data_consulta DESC, id DESC LIMIT 1"
+        triagens = self._consultar(sql, parametros)
+        return triagens[0] if triagens else None
+
+    def extracoes_da_triagem(self, triagem_id):
+        return self._consultar(
+            "SELECT * FROM extracoes WHERE triagem_id = ? ORDER BY id", (triagem_id,)
+        )
+
+    def consultar(
+        self, sujeito=None, link=None, risco=None, inicio=None, fim=None, limite=None
+    ):
+        """Extrações que atendem a todos os filtros informados, mais recentes antes.
+
+        `inicio` e `fim` delimitam `data_consulta` (inclusive) e podem ser só a
+        data ("AAAA-MM-DD").
+        """
+        condicoes = []
+        parametros = []
+        if sujeito is not None:
+            condicoes.append("sujeito_normalizado = ?")
+            parametros.append(normalizar_sujeito(sujeito))
+        if link is not None:
+            condicoes.append("link_canonico = ?")
+            parametros.append(normalizar_url(link))
+        if risco is not None:
+            condicoes.append("risco = ?")
+            parametros.append(risco)
+        if inicio is not None:
+            condicoes.append("data_consulta >= ?")
+            parametros.append(str(inicio))
+        if fim is not None:
+            # "AAAA-MM-DD" inclui o dia inteiro
+            condicoes.append("data_consulta <= ?")
+            parametros.append(f"{fim} 23:59:59" if len(str(fim)) == 10 else str(fim))
+
+        sql = "SELECT * FROM extracoes"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY data_consulta DESC, id DESC"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        return self._consultar(sql, parametros)
+
+    def comparar(self, sujeito, df):
+        """Compara as extrações de `df` com a triagem anterior do sujeito.
+
+        Retorna None se o sujeito nunca foi triado; senão um dict com a
+        triagem `anterior`, os links `novos` e `ausentes` (comparados pela URL
+        canônica) e as `mudancas_risco` (link, risco anterior, risco atual).
+        """
+        anterior = self.ultima_triagem(sujeito)
+        if anterior is None:
+            return None
+
+        riscos_anteriores = {
+            extracao["link_canonico"]: (extracao["link"], extracao["risco"])
+            for extracao in self.extracoes_da_triagem(anterior["id"])
+            if extracao["link_canonico"]
+        }
+        riscos_atuais = {}
+        for registro in df.reindex(columns=["link", "risco"]).to_dict("records"):
+            link = _valor(registro["link"])
+            if link:
+                riscos_atuais[normalizar_url(link)] = (link, _valor(registro["risco"]))
+
+        return {
+            "anterior": anterior,
+            "novos": [
+                link
+                for chave, (link, _) in riscos_atuais.items()
+                if chave not in riscos_anteriores
+            ],
+            "ausentes": [
+                link
+                for chave, (link, _) in riscos_anteriores.items()
+                if chave not in riscos_atuais
+            ],
+            "mudancas_risco": [
+                (link, riscos_anteriores[chave][1], risco)
+                for chave, (link, risco) in riscos_atuais.items()
+                if chave in riscos_anteriores and riscos_anteriores[chave][1] != risco
+            ],
+        }
+
+
+HISTORICO = HistoricoTriagens()
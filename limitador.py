@@ -0,0 +1,236 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Orçamentos padrão do deployment Azure OpenAI
+LLM_RPM = 60
+LLM_TPM = 60000
+
+# Retentativas para respostas 429 da LLM
+RETENTATIVAS_LLM = 5
+BACKOFF_LLM = 2.0
+ESPERA_MAXIMA_LLM = 60.0
+
+# Requisições HTTP por segundo a um mesmo host: taxa inicial (e máxima),
+# rajada, piso após sucessivos bloqueios e quanto a taxa sobe a cada sucesso
+HOST_TAXA = 2.0
+HOST_RAJADA = 4
+HOST_TAXA_MINIMA = 0.05
+HOST_RECUPERACAO = 0.1
+# Pausas de um host após um 429/503 sem Retry-After e após um CAPTCHA
+HOST_PAUSA_LIMITE = 5.0
+HOST_PAUSA_BLOQUEIO = 30.0
+HOST_PAUSA_MAXIMA = 300.0
+STATUS_LIMITE = (429, 503)
+
+
+class BaldeDeTokens:
+    """Token bucket thread-safe: `capacidade` tokens, repostos a `taxa` por segundo."""
+
+    def __init__(self, capacidade, taxa):
+        self.capacidade = float(capacidade)
+        self.taxa = float(taxa)
+        self._tokens = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._tokens = min(
+            self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa
+        )
+        self._ultimo = agora
+
+    def consumir(self, quantidade=1):
+        """Bloqueia até haver `quantidade` tokens disponíveis e os consome."""
+        quantidade = min(float(quantidade), self.capacidade)
+        while True:
+            with self._lock:
+                self._repor()
+                if self._tokens >= quantidade:
+                    self._tokens -= quantidade
+                    return
+                espera = (quantidade - self._tokens) / self.taxa
+            time.sleep(espera)
+
+    def devolver(self, quantidade):
+        with self._lock:
+            self._repor()
+            self._tokens = min(self.capacidade, self._tokens + quantidade)
+
+    def ajustar_taxa(self, taxa):
+        with self._lock:
+            self._repor()
+            self.taxa = float(taxa)
+
+
+def erro_de_limite(erro):
+    """Indica se a exceção corresponde a um HTTP 429 (rate limit)."""
+    if getattr(erro, "status_code", None) == 429:
+        return True
+    response = getattr(erro, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def interpretar_retry_after(valor):
+    """Segundos de espera de um cabeçalho Retry-After (segundos ou data HTTP)."""
+    if valor is None:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def retry_after(erro):
+    response = getattr(erro, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return interpretar_retry_after(headers.get("retry-after"))
+
+
+class AgendadorLLM:
+    """Respeita orçamentos de requisições e tokens por minuto da LLM.
+
+    Cada chamada reserva uma requisição e uma estimativa de tokens antes de
+    ser enviada; respostas 429 são retentadas com backoff exponencial e jitter
+    (ou o `Retry-After` informado pelo servidor).
+    """
+
+    def __init__(
+        self,
+        rpm=LLM_RPM,
+        tpm=LLM_TPM,
+        retentativas=RETENTATIVAS_LLM,
+        backoff=BACKOFF_LLM,
+    ):
+        self.requisicoes = BaldeDeTokens(rpm, rpm / 60)
+        self.tokens = BaldeDeTokens(tpm, tpm / 60)
+        self.retentativas = retentativas
+        self.backoff = backoff
+
+    def aguardar(self, tokens_estimados):
+        self.requisicoes.consumir(1)
+        self.tokens.consumir(tokens_estimados)
+
+    def executar(self, funcao, tokens_estimados):
+        for tentativa in range(self.retentativas + 1):
+            self.aguardar(tokens_estimados)
+            try:
+                return funcao()
+            except Exception as erro:
+                if not erro_de_limite(erro) or tentativa == self.retentativas:
+                    raise
+                espera = retry_after(erro)
+                if espera is None:
+                    espera = min(self.backoff * 2**tentativa, ESPERA_MAXIMA_LLM)
+                    espera *= random.uniform(0.5, 1.5)
+                print(f"Limite da LLM atingido, nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+
+
+class _EstadoHost:
+    def __init__(self, taxa, rajada):
+        self.balde = BaldeDeTokens(rajada, taxa)
+        self.pausado_ate = 0.0
+        self.limites = 0
+        self.bloqueios = 0
+
+
+class LimitadorAdaptativo:
+    """Balde de tokens por host, com a taxa aprendida das respostas.
+
+    Cada host começa em `taxa` requisições por segundo. Um 429/503 ou um
+    CAPTCHA reduz à metade a taxa daquele host e o pausa (pelo Retry-After,
+    quando informado); cada resposta normal devolve `recuperacao` req/s, até
+    `taxa`. Hosts sem problemas não são afetados pelos que estão limitando.
+    """
+
+    def __init__(
+        self,
+        taxa=HOST_TAXA,
+        rajada=HOST_RAJADA,
+        taxa_minima=HOST_TAXA_MINIMA,
+        recuperacao=HOST_RECUPERACAO,
+        pausa_limite=HOST_PAUSA_LIMITE,
+        pausa_bloqueio=HOST_PAUSA_BLOQUEIO,
+        pausa_maxima=HOST_PAUSA_MAXIMA,
+    ):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.taxa_minima = taxa_minima
+        self.recuperacao = recuperacao
+        self.pausa_limite = pausa_limite
+        self.pausa_bloqueio = pausa_bloqueio
+        self.pausa_maxima = pausa_maxima
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _estado(self, url):
+        host = urlparse(url).hostname or url
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _EstadoHost(self.taxa, self.rajada)
+            return self._hosts[host]
+
+    def aguardar(self, url):
+        """Bloqueia até o host de `url` poder receber mais uma requisição."""
+        estado = self._estado(url)
+        while True:
+            espera = estado.pausado_ate - time.monotonic()
+            if espera <= 0:
+                break
+            time.sleep(espera)
+        estado.balde.consumir(1)
+
+    def _desacelerar(self, estado, pausa):
+        with self._lock:
+            estado.balde.ajustar_taxa(max(self.taxa_minima, estado.balde.taxa / 2))
+            estado.pausado_ate = max(
+                estado.pausado_ate,
+                time.monotonic() + min(pausa, self.pausa_maxima),
+            )
+
+    def registrar_resposta(self, url, status_code, headers=None):
+        """Ajusta o host conforme a resposta; retorna True se foi um limite."""
+        estado = self._estado(url)
+        if status_code in STATUS_LIMITE:
+            espera = interpretar_retry_after((headers or {}).get("Retry-After"))
+            estado.limites += 1
+            # Sem Retry-After, pausas crescentes a cada limite seguido
+            if espera is None:
+                espera = self.pausa_limite * min(2 ** (estado.limites - 1), 16)
+                espera *= random.uniform(0.8, 1.2)
+            self._desacelerar(estado, espera)
+            return True
+
+        with self._lock:
+            estado.limites = 0
+            if estado.balde.taxa < self.taxa:
+                estado.balde.ajustar_taxa(
+                    min(self.taxa, estado.balde.taxa + self.recuperacao)
+                )
+        return False
+
+    def registrar_bloqueio(self, url):
+        """Registra um CAPTCHA/página de bloqueio de automação vindo do host."""
+        estado = self._estado(url)
+        estado.bloqueios += 1
+        self._desacelerar(estado, self.pausa_bloqueio)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                host: {
+                    "taxa": estado.balde.taxa,
+                    "limites": estado.limites,
+                    "bloqueios": estado.bloqueios,
+                    "pausado": max(0.0, estado.pausado_ate - time.monotonic()),
+                }
+                for host, estado in self._hosts.items()
+            }
@@ -0,0 +1,319 @@
+"""Triagem em lote: pesquisa e classifica uma lista de sujeitos.
+
+Uso:
+    python lote.py sujeitos.csv --paginas 3 --workers 2 --saida output/lotes/onboarding
+
+A planilha (CSV ou XLSX) traz um sujeito por linha, na coluna "sujeito" ou na
+primeira coluna; a primeira linha é o cabeçalho, a menos que se passe
+--sem-cabecalho. Cada sujeito concluído é registrado em progresso.jsonl no
+diretório de saída; rodar de novo com a mesma saída pula os já concluídos.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import configuracao
+from exportacao import salvar_planilhas
+from extracao import AGENDADOR_LLM, ResumoIncremental
+from historico import HISTORICO
+from metricas import METRICAS, iniciar_servidor
+from resultados import ArmazemResultados
+from triagem import (
+    categorizar_risco,
+    consolidar_triagem,
+    crimes_unicos,
+    executar_triagem,
+    salvar_triagem,
+)
+
+# Sujeitos processados ao mesmo tempo. Os pools HTTP, o cliente da LLM e o
+# agendador de RPM/TPM são de módulo e compartilhados por todos eles.
+LOTE_WORKERS = int(configuracao.obter("LOTE_WORKERS", 2))
+LOTE_PAGINAS = int(configuracao.obter("LOTE_PAGINAS", 3))
+
+ARQUIVO_PROGRESSO = "progresso.jsonl"
+SEPARADORES_CSV = (",", ";", "\t")
+ARQUIVO_CONSOLIDADO = "relatorio_consolidado"
+COLUNAS_CONSOLIDADO = [
+    "sujeito",
+    "risco",
+    "resumo",
+    "crimes",
+    "num_noticias",
+    "risco_anterior",
+    "noticias_novas",
+    "diretorio",
+    "erro",
+]
+
+
+def _ler_bytes(arquivo):
+    if hasattr(arquivo, "read"):
+        conteudo = arquivo.read()
+    else:
+        with open(arquivo, "rb") as f:
+            conteudo = f.read()
+    return conteudo.encode("utf-8") if isinstance(conteudo, str) else conteudo
+
+
+def _decodificar(conteudo):
+    try:
+        return conteudo.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return conteudo.decode("latin-1")
+
+
+def detectar_separador(linhas):
+    """Separador que divide todas as `linhas` no mesmo número (> 1) de campos.
+
+    Um separador que aparece só em parte das linhas ("Silva, João" numa lista
+    com cabeçalho "Nome") faz parte dos nomes, e não da estrutura do CSV.
+    """
+    for separador in SEPARADORES_CSV:
+        campos = {len(linha) for linha in csv.reader(linhas, delimiter=separador)}
+        if len(campos) == 1 and campos.pop() > 1:
+            return separador
+    return None
+
+
+def ler_sujeitos(arquivo, nome=None, cabecalho=True):
+    """Lê os sujeitos de um CSV/XLSX (caminho ou arquivo aberto), sem repetições.
+
+    Com `cabecalho`, a primeira linha é o cabeçalho nos dois formatos e os
+    sujeitos vêm da coluna "sujeito" ou, sem ela, da primeira coluna; sem
+    `cabecalho`, todas as linhas são sujeitos e vale a primeira coluna. O CSV
+    só é dividido em colunas quando `detectar_separador` encontra um separador
+    comum a todas as linhas; caso contrário, cada linha é um sujeito.
+    """
+    nome = str(nome or arquivo)
+    linha_cabecalho = 0 if cabecalho else None
+    if nome.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(arquivo, dtype=str, header=linha_cabecalho)
+    else:
+        texto = _decodificar(_ler_bytes(arquivo))
+        linhas = [linha for linha in texto.splitlines() if linha.strip()]
+        separador = detectar_separador(linhas)
+        if separador:
+            df = pd.read_csv(
+                io.StringIO("\n".join(linhas)),
+                dtype=str,
+                sep=separador,
+                header=linha_cabecalho,
+            )
+        else:
+            # Só remove as aspas de nomes como "Silva, João"; vírgulas sem
+            # aspas continuam no nome
+            linhas = [",".join(next(csv.reader([linha]))).strip() for linha in linhas]
+            if cabecalho:
+                df = pd.DataFrame({linhas[0] if linhas else "sujeito": linhas[1:]})
+            else:
+                df = pd.DataFrame({0: linhas})
+
+    if df.empty:
+        return []
+
+    coluna = df.columns[0]
+    if cabecalho:
+        colunas = {str(c).strip().lower(): c for c in df.columns}
+        coluna = colunas.get("sujeito", coluna)
+    sujeitos = [str(s).strip() for s in df[coluna].dropna()]
+    return list(dict.fromkeys(s for s in sujeitos if s))
+
+
+def diretorio_do_lote(diretorio_base, conteudo):
+    """Diretório determinado pelo conteúdo da planilha, para retomar o mesmo lote."""
+    return os.path.join(diretorio_base, hashlib.sha256(conteudo).hexdigest()[:16])
+
+
+def diretorio_do_sujeito(diretorio_lote, sujeito):
+    nome = unicodedata.normalize("NFKD", sujeito).encode("ascii", "ignore").decode()
+    nome = re.sub(r"[^\w]+", "_", nome).strip("_")[:60] or "sujeito"
+    sufixo = hashlib.sha256(sujeito.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(diretorio_lote, f"{nome}_{sufixo}")
+
+
+class Progresso:
+    """Registro append-only dos sujeitos concluídos de um lote."""
+
+    def __init__(self, diretorio_lote):
+        self.caminho = os.path.join(diretorio_lote, ARQUIVO_PROGRESSO)
+        self._lock = threading.Lock()
+
+    def concluidos(self):
+        registros = {}
+        if not os.path.exists(self.caminho):
+            return registros
+
+        with open(self.caminho, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    # Linha cortada por uma queda no meio da escrita
+                    continue
+                if not registro.get("erro"):
+                    registros[registro["sujeito"]] = registro
+        return registros
+
+    def registrar(self, registro):
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def triar_sujeito(sujeito, diretorio_lote, num_paginas, motores=("google",)):
+    """Pesquisa, classifica e salva os resultados de um sujeito do lote."""
+    with METRICAS.medir("triagem_segundos"):
+        return _triar_sujeito(sujeito, diretorio_lote, num_paginas, motores)
+
+
+def _triar_sujeito(sujeito, diretorio_lote, num_paginas, motores):
+    diretorio = diretorio_do_sujeito(diretorio_lote, sujeito)
+    registro = {"sujeito": sujeito, "diretorio": diretorio}
+
+    resumo = ResumoIncremental(agendador=AGENDADOR_LLM)
+    _, df = executar_triagem(
+        sujeito,
+        num_paginas,
+        motores=motores,
+        armazem=ArmazemResultados(diretorio),
+        resumo=resumo,
+    )
+    if df.empty:
+        registro.update(
+            risco="baixo", resumo="Nenhuma notícia encontrada.", num_noticias=0
+        )
+        return registro
+
+    df, json_final = consolidar_triagem(df, resumo)
+    salvar_triagem(diretorio, df, json_final)
+
+    comparacao = HISTORICO.comparar(sujeito, df)
+    HISTORICO.registrar_triagem(sujeito, df, json_final, diretorio)
+    registro.update(
+        risco=json_final["risco"],
+        resumo=json_final["resumo"],
+        crimes=", ".join(crimes_unicos(df)),
+        num_noticias=len(df),
+        risco_anterior=comparacao and comparacao["anterior"]["risco"],
+        noticias_novas=comparacao and len(comparacao["novos"]),
+    )
+    return registro
+
+
+def gerar_lote(
+    sujeitos,
+    diretorio_lote,
+    num_paginas=LOTE_PAGINAS,
+    motores=("google",),
+    max_workers=LOTE_WORKERS,
+):
+    """Produz o registro de cada sujeito do lote conforme ele é concluído.
+
+    Sujeitos já concluídos em uma execução anterior são produzidos primeiro, a
+    partir do progresso.jsonl, sem nova pesquisa. Falhas de um sujeito não
+    interrompem o lote: o registro traz o `erro` e o sujeito é refeito na
+    próxima execução.
+    """
+    os.makedirs(diretorio_lote, exist_ok=True)
+    progresso = Progresso(diretorio_lote)
+    concluidos = progresso.concluidos()
+
+    pendentes = []
+    for sujeito in sujeitos:
+        if sujeito in concluidos:
+            yield concluidos[sujeito]
+        else:
+            pendentes.append(sujeito)
+
+    if concluidos:
+        print(
+            f"Retomando lote: {len(sujeitos) - len(pendentes)} sujeitos já concluídos"
+        )
+
+    # Sem `with`: se o consumidor parar (Ctrl-C, nova execução do Streamlit), o
+    # gerador é fechado e os sujeitos ainda não iniciados são cancelados, em
+    # vez de esperar o lote inteiro no shutdown do executor
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futuros = {
+            executor.submit(
+                triar_sujeito, sujeito, diretorio_lote, num_paginas, motores
+            ): sujeito
+            for sujeito in pendentes
+        }
+        for futuro in as_completed(futuros):
+            sujeito = futuros[futuro]
+            try:
+                registro = futuro.result()
+            except Exception as erro:
+                print(f"Erro na triagem de {sujeito}: {erro}")
+                registro = {"sujeito": sujeito, "erro": str(erro)}
+            progresso.registrar(registro)
+            yield registro
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def salvar_relatorio_consolidado(diretorio_lote, registros):
+    """Grava o relatório consolidado (uma linha por sujeito) em CSV e XLSX."""
+    df = pd.DataFrame(list(registros), columns=COLUNAS_CONSOLIDADO)
+    df["risco"] = categorizar_risco(df["risco"])
+    df = df.sort_values(["risco", "sujeito"])
+
+    salvar_planilhas(df, os.path.join(diretorio_lote, ARQUIVO_CONSOLIDADO))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Triagem de uma lista de sujeitos.")
+    parser.add_argument("planilha", help="CSV ou XLSX com os sujeitos")
+    parser.add_argument("--paginas", type=int, default=LOTE_PAGINAS)
+    parser.add_argument("--workers", type=int, default=LOTE_WORKERS)
+    parser.add_argument("--motores", nargs="+", default=["google"])
+    parser.add_argument(
+        "--sem-cabecalho",
+        action="store_true",
+        help="A primeira linha da planilha já é um sujeito",
+    )
+    parser.add_argument(
+        "--saida",
+        help="Diretório do lote (padrão: output/lotes/<nome da planilha>)",
+    )
+    args = parser.parse_args()
+    iniciar_servidor()
+
+    diretorio_lote = args.saida or os.path.join(
+        Path(__file__).parent, "output", "lotes", Path(args.planilha).stem
+    )
+    sujeitos = ler_sujeitos(args.planilha, cabecalho=not args.sem_cabecalho)
+    print(f"{len(sujeitos)} sujeitos; saída em '{diretorio_lote}'")
+
+    registros = []
+    for registro in gerar_lote(
+        sujeitos, diretorio_lote, args.paginas, args.motores, args.workers
+    ):
+        registros.append(registro)
+        print(f"[{len(registros)}/{len(sujeitos)}] {registro['sujeito']}")
+        METRICAS.salvar()
+
+    salvar_relatorio_consolidado(diretorio_lote, registros)
+    print(f"Relatório consolidado salvo em '{diretorio_lote}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import configuracao
+
+PREFIXO = "pld_"
+
+# Limites (em segundos) dos histogramas de latência
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Arquivo no formato texto do Prometheus (coletável pelo textfile collector do
+# node_exporter) e porta opcional para servir as métricas por HTTP
+ARQUIVO_METRICAS = Path(
+    configuracao.obter(
+        "METRICAS_ARQUIVO", Path(__file__).parent / "output" / "metricas.prom"
+    )
+)
+PORTA_METRICAS = configuracao.obter("METRICAS_PORTA")
+
+AJUDA = {
+    "busca_pagina_segundos": "Latência de uma página de resultados da busca.",
+    "download_segundos": "Latência do download de uma notícia, por host.",
+    "download_bytes_total": "Bytes de notícias baixados, por host.",
+    "parse_segundos": "Tempo de extração do texto de uma página.",
+    "llm_segundos": "Latência de uma chamada à LLM, por etapa.",
+    "llm_tokens_total": "Tokens enviados (prompt) e recebidos (completion).",
+    "llm_custo_usd_total": "Custo estimado das chamadas à LLM, em dólares.",
+    "cache_consultas_total": "Consultas aos caches, por resultado (hit/miss).",
+    "triagem_segundos": "Duração da triagem completa de um sujeito do lote.",
+}
+
+
+def _rotulos(rotulos):
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+def _escapar(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return (
+        "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + "}"
+    )
+
+
+class _Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)
+        self.soma = 0.0
+        self.quantidade = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.quantidade += 1
+
+
+class Metricas:
+    """Contadores e histogramas com rótulos, seguros entre threads.
+
+    Exportados no formato texto do Prometheus/OpenMetrics por `texto`. Para
+    medir uma execução, compare dois `instantaneo` com `resumo_execucao`.
+    """
+
+    def __init__(self, buckets=BUCKETS_SEGUNDOS):
+        self.buckets = tuple(buckets)
+        self._contadores = {}
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, _rotulos(rotulos))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        chave = (nome, _rotulos(rotulos))
+        with self._lock:
+            if chave not in self._histogramas:
+                self._histogramas[chave] = _Histograma(self.buckets)
+            self._histogramas[chave].observar(valor)
+
+    @contextmanager
+    def medir(self, nome, **rotulos):
+        """Observa em `nome` a duração, em segundos, do bloco `with`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def instantaneo(self):
+        with self._lock:
+            return {
+                "contadores": dict(self._contadores),
+                "histogramas": {
+                    chave: (list(h.contagens), h.soma, h.quantidade)
+                    for chave, h in self._histogramas.items()
+                },
+            }
+
+    def _quantil(self, contagens, quantidade, q):
+        # Interpolação linear dentro do bucket, como o histogram_quantile do
+        # Prometheus; acima do último limite, retorna o último limite
+        alvo = q * quantidade
+        acumulado = 0
+        inferior = 0.0
+        for limite, contagem in zip(self.buckets, contagens):
+            if contagem and acumulado + contagem >= alvo:
+                return inferior + (limite - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+            inferior = limite
+        return self.buckets[-1]
+
+    def resumo_execucao(self, antes, depois=None, manter_rotulos=None):
+        """Latências e contadores acumulados entre dois instantâneos.
+
+        Retorna (etapas, contadores): para cada histograma (nome e rótulos) a
+        quantidade, o total e a média em segundos e o p50 e o p95 estimados a
+        partir dos buckets; e o quanto cada contador cresceu. Com
+        `manter_rotulos`, as séries dos histogramas que só diferem em outros
+        rótulos (ex.: o host) são somadas.
+        """
+        depois = depois or self.instantaneo()
+        agrupados = {}
+        for chave, (contagens, soma, quantidade) in depois["histogramas"].items():
+            anteriores, soma_anterior, quantidade_anterior = antes["histogramas"].get(
+                chave, ([0] * len(contagens), 0.0, 0)
+            )
+            if quantidade - quantidade_anterior <= 0:
+                continue
+
+            nome, rotulos = chave
+            if manter_rotulos is not None:
+                rotulos = tuple(par for par in rotulos if par[0] in manter_rotulos)
+            grupo = agrupados.setdefault(
+                (nome, rotulos), [[0] * len(contagens), 0.0, 0]
+            )
+            grupo[0] = [g + a - b for g, a, b in zip(grupo[0], contagens, anteriores)]
+            grupo[1] += soma - soma_anterior
+            grupo[2] += quantidade - quantidade_anterior
+
+        etapas = [
+            {
+                "etapa": nome,
+                "rotulos": dict(rotulos),
+                "quantidade": quantidade,
+                "total_s": soma,
+                "media_s": soma / quantidade,
+                "p50_s": self._quantil(contagens, quantidade, 0.5),
+                "p95_s": self._quantil(contagens, quantidade, 0.95),
+            }
+            for (nome, rotulos), (contagens, soma, quantidade) in sorted(
+                agrupados.items()
+            )
+        ]
+
+        contadores = {}
+        for chave, valor in depois["contadores"].items():
+            diferenca = valor - antes["contadores"].get(chave, 0)
+            if diferenca:
+                contadores[chave] = diferenca
+        return etapas, contadores
+
+    def texto(self):
+        """Métricas no formato texto do Prometheus."""
+        instantaneo = self.instantaneo()
+        linhas = []
+
+        por_nome = {}
+        for (nome, rotulos), valor in instantaneo["contadores"].items():
+            por_nome.setdefault(nome, []).append((rotulos, valor))
+        for nome, series in sorted(por_nome.items()):
+            metrica = PREFIXO + nome
+            if nome in AJUDA:
+                linhas.append(f"# HELP {metrica} {AJUDA[nome]}")
+            linhas.append(f"# TYPE {metrica} counter")
+            for rotulos, valor in series:
+                linhas.append(f"{metrica}{_formatar_rotulos(rotulos)} {valor}")
+
+        por_nome = {}
+        for (nome, rotulos), dados in instantaneo["histogramas"].items():
+            por_nome.setdefault(nome, []).append((rotulos, dados))
+        for nome, series in sorted(por_nome.items()):
+            metrica = PREFIXO + nome
+            if nome in AJUDA:
+                linhas.append(f"# HELP {metrica} {AJUDA[nome]}")
+            linhas.append(f"# TYPE {metrica} histogram")
+            for rotulos, (contagens, soma, quantidade) in series:
+                acumulado = 0
+                for limite, contagem in zip(self.buckets + ("+Inf",), contagens):
+                    acumulado += contagem
+                    le = _formatar_rotulos(rotulos, [("le", str(limite))])
+                    linhas.append(f"{metrica}_bucket{le} {acumulado}")
+                linhas.append(f"{metrica}_sum{_formatar_rotulos(rotulos)} {soma}")
+                linhas.append(
+                    f"{metrica}_count{_formatar_rotulos(rotulos)} {quantidade}"
+                )
+
+        return "\n".join(linhas) + "\n"
+
+    def salvar(self, caminho=ARQUIVO_METRICAS):
+        """Grava as métricas em `caminho` de forma atômica."""
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(
+            f"{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        temporario.write_text(self.texto(), encoding="utf-8")
+        os.replace(temporario, caminho)
+
+
+METRICAS = Metricas()
+
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+def iniciar_servidor(porta=PORTA_METRICAS, metricas=METRICAS):
+    """Serve /metrics em `porta`, uma vez por processo; sem porta, não faz nada."""
+    global _servidor
+    if not porta:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            corpo = metricas.texto().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock_servidor:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer(("0.0.0.0", int(porta)), Handler)
+            threading.Thread(target=_servidor.serve_forever, daemon=True).start()
+    return _servidor
@@ -0,0 +1,104 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import configuracao
+
+# Orçamento de tokens do texto da notícia enviado à LLM e quantos caracteres
+# manter antes e depois de cada menção ao sujeito
+MAX_TOKENS_NOTICIA = int(configuracao.obter("LLM_MAX_TOKENS_NOTICIA", 6000))
+JANELA_MENCAO = int(configuracao.obter("LLM_JANELA_MENCAO", 1500))
+
+SEPARADOR_TRECHOS = " [...] "
+
+
+@lru_cache(maxsize=None)
+def _codificador(modelo):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(modelo or "")
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as erro:
+        # O tiktoken baixa a codificação no primeiro uso; sem rede, estimamos
+        print(f"Codificação de tokens indisponível, usando estimativa: {erro}")
+        return None
+
+
+def contar_tokens(texto, modelo):
+    codificador = _codificador(modelo)
+    if codificador is None:
+        return len(texto) // 4
+    return len(codificador.encode(texto, disallowed_special=()))
+
+
+def truncar_por_tokens(texto, max_tokens, modelo):
+    codificador = _codificador(modelo)
+    if codificador is None:
+        return texto[: max_tokens * 4]
+
+    tokens = codificador.encode(texto, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return texto
+    return codificador.decode(tokens[:max_tokens])
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, preservando o tamanho (posição a posição)."""
+    return "".join(
+        unicodedata.normalize("NFKD", caractere)[:1] or caractere
+        for caractere in texto.lower()
+    )
+
+
+def nome_do_sujeito(sujeito):
+    """Nome pesquisado, sem os operadores da consulta (ex.: "Fulano + crime OR ...")."""
+    nome = re.split(r"\s\+\s|\sOR\s|\sAND\s", sujeito)[0]
+    return normalizar(nome.strip().strip('"').strip())
+
+
+def recortar_mencoes(texto, sujeito, janela=JANELA_MENCAO):
+    """Mantém só os trechos ao redor das menções ao sujeito.
+
+    Trechos sobrepostos são unidos. Sem menções, o texto é retornado inteiro.
+    """
+    nome = nome_do_sujeito(sujeito)
+    texto_normalizado = normalizar(texto)
+    if not nome or len(texto_normalizado) != len(texto):
+        return texto
+
+    intervalos = []
+    for mencao in re.finditer(re.escape(nome), texto_normalizado):
+        inicio = max(0, mencao.start() - janela)
+        fim = min(len(texto), mencao.end() + janela)
+        if intervalos and inicio <= intervalos[-1][1]:
+            intervalos[-1][1] = fim
+        else:
+            intervalos.append([inicio, fim])
+
+    if not intervalos:
+        return texto
+
+    return SEPARADOR_TRECHOS.join(texto[inicio:fim] for inicio, fim in intervalos)
+
+
+def preparar_texto(
+    texto, sujeito, modelo, max_tokens=MAX_TOKENS_NOTICIA, janela=JANELA_MENCAO
+):
+    """Recorta o texto nas menções ao sujeito e o limita a `max_tokens`.
+
+    Retorna (texto_preparado, tokens_originais, tokens_preparados).
+    """
+    tokens_originais = contar_tokens(texto, modelo)
+
+    texto_preparado = recortar_mencoes(texto, sujeito, janela)
+    texto_preparado = truncar_por_tokens(texto_preparado, max_tokens, modelo)
+
+    if texto_preparado == texto:
+        return texto, tokens_originais, tokens_originais
+    return texto_preparado, tokens_originais, contar_tokens(texto_preparado, modelo)
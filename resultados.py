@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+DIRETORIO_EXECUCOES = Path(__file__).parent / "output" / "execucoes"
+
+ARQUIVO_EXECUCAO = "execucao.json"
+ARQUIVO_RESULTADOS = "resultados.jsonl"
+
+
+def novo_diretorio_execucao(diretorio_base=DIRETORIO_EXECUCOES):
+    """Diretório exclusivo de uma execução, para que pesquisas simultâneas não
+    sobrescrevam os arquivos umas das outras."""
+    nome = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    return os.path.join(diretorio_base, nome)
+
+
+def ler_resultados(caminho):
+    """Itera os registros de um resultados.jsonl sem carregar o arquivo inteiro."""
+    if not os.path.exists(caminho):
+        return
+
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                # Última linha cortada por uma interrupção no meio da escrita
+                continue
+
+
+class ArmazemResultados:
+    """Resultados de uma execução: um registro JSON por notícia, só acrescentados.
+
+    Cada notícia é gravada assim que é classificada, de modo que a memória não
+    cresce com o número de páginas e uma execução interrompida mantém o que já
+    foi processado.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = str(diretorio)
+        self.caminho = os.path.join(self.diretorio, ARQUIVO_RESULTADOS)
+        self._lock = threading.Lock()
+
+    def iniciar(self, metadados):
+        """Grava os metadados da execução e descarta resultados anteriores."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        with open(
+            os.path.join(self.diretorio, ARQUIVO_EXECUCAO), "w", encoding="utf-8"
+        ) as f:
+            json.dump(metadados, f, ensure_ascii=False, indent=4)
+        with self._lock:
+            open(self.caminho, "w", encoding="utf-8").close()
+
+    def registrar(self, registro):
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha)
+
+    def metadados(self):
+        with open(
+            os.path.join(self.diretorio, ARQUIVO_EXECUCAO), encoding="utf-8"
+        ) as f:
+            return json.load(f)
+
+    def __iter__(self):
+        return ler_resultados(self.caminho)
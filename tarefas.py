@@ -0,0 +1,127 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import configuracao
+
+# Triagens executadas em segundo plano ao mesmo tempo, somando todos os usuários
+TAREFAS_WORKERS = int(configuracao.obter("TAREFAS_WORKERS", 4))
+# Tarefas finalizadas mantidas em memória para consulta pela interface
+TAREFAS_MAX_FINALIZADAS = int(configuracao.obter("TAREFAS_MAX_FINALIZADAS", 50))
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluída"
+FALHOU = "falhou"
+
+# Etapas cujos itens são guardados como resultados parciais: as notícias
+# classificadas de uma pesquisa e os sujeitos concluídos de um lote
+ETAPAS_PARCIAIS = ("classificados", "sujeitos")
+
+
+class Tarefa:
+    """Estado de uma triagem em segundo plano, consultável de outras threads."""
+
+    def __init__(self, descricao, total=None):
+        self.id = uuid.uuid4().hex
+        self.descricao = descricao
+        self.total = total
+        self.criada_em = time.time()
+        self.finalizada_em = None
+        self.estado = PENDENTE
+        self.contadores = {}
+        self.parciais = []
+        self.resultado = None
+        self.erro = None
+        self._lock = threading.Lock()
+
+    @property
+    def finalizada(self):
+        return self.estado in (CONCLUIDA, FALHOU)
+
+    def registrar(self, etapa, item=None):
+        """Conta um evento da etapa; os itens de ETAPAS_PARCIAIS ficam como parciais."""
+        with self._lock:
+            self.contadores[etapa] = self.contadores.get(etapa, 0) + 1
+            if etapa in ETAPAS_PARCIAIS and item is not None:
+                self.parciais.append(item)
+
+    def instantaneo(self):
+        """Cópia consistente do estado, para exibir sem segurar o lock."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "descricao": self.descricao,
+                "total": self.total,
+                "estado": self.estado,
+                "contadores": dict(self.contadores),
+                "parciais": list(self.parciais),
+                "resultado": self.resultado,
+                "erro": self.erro,
+                "duracao": (self.finalizada_em or time.time()) - self.criada_em,
+            }
+
+    def _executar(self, funcao):
+        with self._lock:
+            self.estado = EXECUTANDO
+        try:
+            resultado = funcao(self)
+        except Exception as erro:
+            traceback.print_exc()
+            with self._lock:
+                self.erro = str(erro)
+                self.estado = FALHOU
+                self.finalizada_em = time.time()
+            return
+
+        with self._lock:
+            self.resultado = resultado
+            self.estado = CONCLUIDA
+            self.finalizada_em = time.time()
+
+
+class GerenciadorTarefas:
+    """Fila de triagens executadas em um pool de threads, identificadas por id.
+
+    `funcao(tarefa)` roda em segundo plano e pode chamar `tarefa.registrar`
+    para publicar progresso; o valor retornado vira `tarefa.resultado`. Com
+    `total`, a interface mostra o progresso como uma fração (ex.: sujeitos de
+    um lote).
+    """
+
+    def __init__(self, max_workers=TAREFAS_WORKERS, max_finalizadas=None):
+        self.max_finalizadas = (
+            TAREFAS_MAX_FINALIZADAS if max_finalizadas is None else max_finalizadas
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tarefa"
+        )
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, funcao, descricao="", total=None):
+        tarefa = Tarefa(descricao, total)
+        with self._lock:
+            self._descartar_finalizadas()
+            self._tarefas[tarefa.id] = tarefa
+        self._executor.submit(tarefa._executar, funcao)
+        return tarefa.id
+
+    def obter(self, id_tarefa):
+        with self._lock:
+            return self._tarefas.get(id_tarefa)
+
+    def _descartar_finalizadas(self):
+        finalizadas = sorted(
+            (t for t in self._tarefas.values() if t.finalizada),
+            key=lambda t: t.finalizada_em,
+        )
+        for tarefa in finalizadas[: max(0, len(finalizadas) - self.max_finalizadas)]:
+            del self._tarefas[tarefa.id]
+
+
+# Compartilhado entre as sessões do Streamlit: o módulo é importado uma vez por
+# processo e sobrevive às reexecuções do script
+GERENCIADOR = GerenciadorTarefas()
@@ -0,0 +1,78 @@
+import pytest
+
+from coleta import PARSER_HTML, extrair_texto_html, site_bloqueado
+
+FRASES = " ".join(
+    f"Frase {numero} da notícia sobre a investigação do Grupo Exemplo."
+    for numero in range(20)
+)
+
+PARSERS = sorted({"html.parser", PARSER_HTML})
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_pagina_webforms_dentro_de_form(parser):
+    html = f"""
+    <html><body><form id="form1" method="post">
+      <header><nav><a href="/">Início</a></nav></header>
+      <div id="conteudo"><p>{FRASES}</p></div>
+      <footer>Todos os direitos reservados</footer>
+    </form></body></html>
+    """
+    texto = extrair_texto_html(html, parser)
+    assert FRASES in texto
+    assert "Início" not in texto
+    assert "direitos reservados" not in texto
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_article_dentro_de_form_mantem_cabecalho(parser):
+    html = f"""
+    <html><body><form id="form1">
+      <header><a href="/">Portal</a></header>
+      <article>
+        <header><h1>Grupo Exemplo é alvo de operação</h1></header>
+        <p>{FRASES}</p>
+        <footer>Por Redação</footer>
+      </article>
+      <footer>Rodapé do portal</footer>
+    </form></body></html>
+    """
+    texto = extrair_texto_html(html, parser)
+    assert texto.startswith("Grupo Exemplo é alvo de operação")
+    assert FRASES in texto
+    assert "Por Redação" in texto
+    assert "Portal" not in texto
+    assert "Rodapé do portal" not in texto
+
+
+@pytest.mark.parametrize(
+    "link",
+    [
+        "https://www.google.com/search?q=x",
+        "https://www.google.com.br/url?q=x",
+        "https://www.google.com.ar/",
+        "https://maps.google.com.mx/maps",
+        "https://www.google.se/",
+        "https://www.transfermarkt.co.uk/spieler",
+        "https://www.transfermarkt.com.br/jogador",
+        "https://www.transfermarkt.co/jugador",
+        "https://pt.wikipedia.org/wiki/Exemplo",
+        "https://m.youtube.com/watch?v=x",
+    ],
+)
+def test_site_bloqueado(link):
+    assert site_bloqueado(link)
+
+
+@pytest.mark.parametrize(
+    "link",
+    [
+        "https://g1.globo.com/politica/noticia.html",
+        "https://google.blogspot.com/2020/01/post.html",
+        "https://www.noticias.example/google/materia.html",
+        "https://www.estadao.com.br/?ref=google.com",
+    ],
+)
+def test_site_nao_bloqueado(link):
+    assert not site_bloqueado(link)
@@ -0,0 +1,83 @@
+import threading
+
+from deduplicacao import (
+    AgrupadorDuplicatas,
+    classificador_sem_duplicatas,
+    distancia_hamming,
+    simhash,
+)
+
+MATERIA = " ".join(
+    f"A Polícia Federal deflagrou a fase {fase} da operação que investiga o "
+    f"desvio de {fase * 3} milhões em contratos de obras firmados pela empresa "
+    f"com o município, segundo a denúncia apresentada pelo Ministério Público."
+    for fase in range(1, 9)
+)
+# A mesma matéria republicada por outro portal, com título e assinatura próprios
+REPUBLICADA = (
+    "Operação da PF mira desvios em obras. "
+    + MATERIA
+    + " Com informações da agência de notícias."
+)
+OUTRA = " ".join(
+    f"O time venceu o clássico por {gols} a 1 no estádio lotado e assumiu a "
+    f"liderança do campeonato na rodada {gols + 10}, diante de milhares de torcedores."
+    for gols in range(2, 10)
+)
+
+
+def test_textos_quase_iguais_ficam_no_mesmo_grupo():
+    assert distancia_hamming(simhash(MATERIA), simhash(REPUBLICADA)) <= 3
+
+    agrupador = AgrupadorDuplicatas()
+    assert agrupador.agrupar("a", MATERIA) == "a"
+    assert agrupador.agrupar("b", OUTRA) == "b"
+    assert agrupador.agrupar("c", REPUBLICADA) == "a"
+
+
+def test_textos_curtos_nao_sao_agrupados():
+    agrupador = AgrupadorDuplicatas()
+    assert simhash("Texto curto demais.") is None
+    assert agrupador.agrupar("a", "Texto curto demais.") == "a"
+    assert agrupador.agrupar("b", "Texto curto demais.") == "b"
+
+
+def test_duplicatas_sao_classificadas_uma_vez():
+    chamadas = []
+    iniciou = threading.Event()
+    liberar = threading.Event()
+
+    def classificar(artigo):
+        chamadas.append(artigo["link"])
+        iniciou.set()
+        liberar.wait(5)
+        return {"link": artigo["link"], "risco": "alto"}
+
+    classificar_artigo = classificador_sem_duplicatas(classificar)
+    artigos = [
+        {"link": "https://a.example/1", "conteudo": MATERIA},
+        {"link": "https://b.example/2", "conteudo": REPUBLICADA},
+    ]
+    resultados = {}
+    threads = [
+        threading.Thread(
+            target=lambda artigo=artigo: resultados.update(
+                {artigo["link"]: classificar_artigo(artigo)}
+            )
+        )
+        for artigo in artigos
+    ]
+    # A republicada chega enquanto a original ainda está sendo classificada
+    threads[0].start()
+    iniciou.wait(5)
+    threads[1].start()
+    liberar.set()
+    for thread in threads:
+        thread.join()
+
+    assert chamadas == ["https://a.example/1"]
+    assert resultados["https://b.example/2"] == {
+        "link": "https://b.example/2",
+        "risco": "alto",
+        "duplicata_de": "https://a.example/1",
+    }
@@ -0,0 +1,116 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from limitador import (
+    AgendadorLLM,
+    BaldeDeTokens,
+    LimitadorAdaptativo,
+    interpretar_retry_after,
+)
+
+
+class ErroLimite(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        headers = {} if retry_after is None else {"retry-after": retry_after}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def test_429_com_retry_after_reduz_a_taxa_e_pausa_so_o_host():
+    limitador = LimitadorAdaptativo(taxa=2.0)
+    limitado = "https://limitado.example/noticia"
+    assert limitador.registrar_resposta(limitado, 429, {"Retry-After": "10"})
+
+    estatisticas = limitador.estatisticas()["limitado.example"]
+    assert estatisticas["taxa"] == 1.0
+    assert 9 < estatisticas["pausado"] <= 10
+
+    inicio = time.monotonic()
+    limitador.aguardar("https://outro.example/noticia")
+    assert time.monotonic() - inicio < 0.5
+    assert limitador.estatisticas()["outro.example"]["taxa"] == 2.0
+
+
+def test_limites_seguidos_param_na_taxa_minima():
+    limitador = LimitadorAdaptativo(taxa=2.0, taxa_minima=0.5)
+    for _ in range(5):
+        limitador.registrar_resposta("https://a.example/", 503, {"Retry-After": "0"})
+    assert limitador.estatisticas()["a.example"]["taxa"] == 0.5
+
+
+def test_respostas_normais_recuperam_a_taxa_ate_o_maximo():
+    limitador = LimitadorAdaptativo(taxa=2.0, recuperacao=0.5)
+    limitador.registrar_resposta("https://a.example/", 429, {"Retry-After": "0"})
+    for _ in range(10):
+        assert not limitador.registrar_resposta("https://a.example/", 200)
+    assert limitador.estatisticas()["a.example"]["taxa"] == 2.0
+
+
+def test_bloqueio_pausa_o_host():
+    limitador = LimitadorAdaptativo(taxa=2.0, pausa_bloqueio=30.0)
+    limitador.registrar_bloqueio("https://a.example/")
+    estatisticas = limitador.estatisticas()["a.example"]
+    assert estatisticas["bloqueios"] == 1
+    assert estatisticas["taxa"] == 1.0
+    assert estatisticas["pausado"] > 29
+
+
+def test_interpretar_retry_after():
+    assert interpretar_retry_after("7") == 7.0
+    assert interpretar_retry_after("-3") == 0.0
+    assert interpretar_retry_after(None) is None
+    assert interpretar_retry_after("amanhã") is None
+    data_http = formatdate(time.time() + 30, usegmt=True)
+    assert 25 < interpretar_retry_after(data_http) <= 30
+
+
+def test_balde_espera_pela_reposicao():
+    balde = BaldeDeTokens(capacidade=2, taxa=20)
+    inicio = time.monotonic()
+    balde.consumir(2)
+    assert time.monotonic() - inicio < 0.02
+    balde.consumir(1)
+    assert time.monotonic() - inicio >= 0.04
+
+
+def test_agendador_retenta_429_pelo_retry_after():
+    agendador = AgendadorLLM(rpm=6000, tpm=10**6, retentativas=3)
+    chamadas = []
+
+    def chamar():
+        chamadas.append(1)
+        if len(chamadas) < 3:
+            raise ErroLimite(retry_after="0")
+        return "ok"
+
+    assert agendador.executar(chamar, tokens_estimados=10) == "ok"
+    assert len(chamadas) == 3
+
+
+def test_agendador_desiste_depois_das_retentativas():
+    agendador = AgendadorLLM(rpm=6000, tpm=10**6, retentativas=2)
+    chamadas = []
+
+    def chamar():
+        chamadas.append(1)
+        raise ErroLimite(retry_after="0")
+
+    with pytest.raises(ErroLimite):
+        agendador.executar(chamar, tokens_estimados=10)
+    assert len(chamadas) == 3
+
+
+def test_agendador_nao_retenta_outros_erros():
+    agendador = AgendadorLLM(rpm=6000, tpm=10**6)
+    chamadas = []
+
+    def chamar():
+        chamadas.append(1)
+        raise ValueError("resposta inválida")
+
+    with pytest.raises(ValueError):
+        agendador.executar(chamar, tokens_estimados=10)
+    assert len(chamadas) == 1
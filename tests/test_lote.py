@@ -0,0 +1,53 @@
+import io
+
+import pandas as pd
+import pytest
+
+from lote import ler_sujeitos
+
+NOMES = ["Fulano de Tal", "Empresa X Ltda", "Maria da Silva"]
+
+
+def ler_csv(texto, **kwargs):
+    return ler_sujeitos(io.BytesIO(texto.encode("utf-8")), "sujeitos.csv", **kwargs)
+
+
+@pytest.mark.parametrize("cabecalho", ["sujeito", "Nome"])
+def test_csv_de_uma_coluna(cabecalho):
+    assert ler_csv("\n".join([cabecalho] + NOMES) + "\n") == NOMES
+
+
+def test_csv_de_uma_coluna_sem_cabecalho():
+    assert ler_csv("\n".join(NOMES), cabecalho=False) == NOMES
+
+
+def test_csv_de_uma_coluna_em_arquivo(tmp_path):
+    caminho = tmp_path / "sujeitos.csv"
+    caminho.write_text("sujeito\n" + "\n".join(NOMES), encoding="utf-8")
+    assert ler_sujeitos(str(caminho)) == NOMES
+
+
+def test_nomes_com_virgula():
+    assert ler_csv("Nome\nSilva, João\nSouza, Ana") == ["Silva, João", "Souza, Ana"]
+
+
+def test_nomes_com_virgula_entre_aspas_sem_cabecalho():
+    texto = '"Silva, João"\n"Souza, Ana"'
+    assert ler_csv(texto, cabecalho=False) == ["Silva, João", "Souza, Ana"]
+
+
+@pytest.mark.parametrize("separador", [",", ";", "\t"])
+def test_csv_com_varias_colunas(separador):
+    linhas = [separador.join(["cpf", "Sujeito"])] + [
+        separador.join([str(numero), nome]) for numero, nome in enumerate(NOMES)
+    ]
+    assert ler_csv("\n".join(linhas)) == NOMES
+
+
+@pytest.mark.parametrize("cabecalho", [True, False])
+def test_xlsx_segue_a_mesma_regra_de_cabecalho(tmp_path, cabecalho):
+    pytest.importorskip("openpyxl")
+    caminho = tmp_path / "sujeitos.xlsx"
+    linhas = (["Nome"] if cabecalho else []) + NOMES
+    pd.DataFrame(linhas).to_excel(caminho, index=False, header=False)
+    assert ler_sujeitos(str(caminho), cabecalho=cabecalho) == NOMES
@@ -0,0 +1,64 @@
+import re
+import threading
+
+import pytest
+
+import extracao
+from extracao import ResumoIncremental
+
+POR_LOTE = 4
+
+
+@pytest.fixture
+def chamadas(monkeypatch):
+    """Substitui a LLM por um `resumir` que concatena e registra cada lote."""
+    registradas = []
+    lock = threading.Lock()
+
+    def resumir(resumos, agendador=None):
+        with lock:
+            registradas.append(list(resumos))
+        return "(" + " ".join(resumos) + ")"
+
+    monkeypatch.setattr(extracao, "resumir", resumir)
+    return registradas
+
+
+def test_arvore_mantem_cada_resumo_uma_vez(chamadas):
+    for quantidade in range(201):
+        chamadas.clear()
+        resumo = ResumoIncremental(por_lote=POR_LOTE, max_tokens=10**6, max_workers=4)
+        esperados = [f"r{numero}" for numero in range(quantidade)]
+        for texto in esperados:
+            resumo.adicionar(texto)
+
+        final = resumo.finalizar()
+
+        assert sorted(re.findall(r"r\d+", final)) == sorted(esperados), quantidade
+        assert all(len(lote) <= POR_LOTE for lote in chamadas), quantidade
+
+
+def test_resumos_repetidos_entram_uma_vez(chamadas):
+    resumo = ResumoIncremental(por_lote=POR_LOTE, max_tokens=10**6)
+    for texto in ["a", "b", "a", "", "b", "c"]:
+        resumo.adicionar(texto)
+    assert resumo.finalizar() == "(a b c)"
+    assert chamadas == [["a", "b", "c"]]
+
+
+def test_lotes_respeitam_max_tokens(chamadas):
+    resumo = ResumoIncremental(por_lote=50, max_tokens=40, max_workers=2)
+    textos = [f"resumo {numero} " + "palavra " * 10 for numero in range(30)]
+    for texto in textos:
+        resumo.adicionar(texto)
+    final = resumo.finalizar()
+
+    assert sorted(map(int, re.findall(r"resumo (\d+)", final))) == list(range(30))
+    assert all(len(lote) > 0 for lote in chamadas)
+    folhas = [lote for lote in chamadas if "(" not in "".join(lote)]
+    assert folhas
+    for lote in folhas:
+        tokens = [
+            extracao.contar_tokens(texto, extracao.AZURE_OPENAI_MODEL) for texto in lote
+        ]
+        assert sum(tokens) <= 40
@@ -0,0 +1,31 @@
+import pytest
+
+from triagem import CATEGORIAS_RISCO, montar_dataframe, risco_final
+
+
+@pytest.mark.parametrize(
+    "riscos, esperado",
+    [
+        (["baixo", "Médio", "baixo"], "médio"),
+        (["baixo", " medio "], "médio"),
+        (["médio", "ALTO"], "alto"),
+        (["baixo", "baixo"], "baixo"),
+        ([], "baixo"),
+    ],
+)
+def test_risco_final(riscos, esperado):
+    registros = [
+        {"link": f"https://noticia.example/{i}", "risco": risco}
+        for i, risco in enumerate(riscos)
+    ]
+    assert risco_final(montar_dataframe(registros)) == esperado
+
+
+def test_grafias_de_risco_viram_categorias():
+    registros = [
+        {"link": f"https://noticia.example/{i}", "risco": risco}
+        for i, risco in enumerate(["Alto", "medio", "Médio", "baixo "])
+    ]
+    riscos = montar_dataframe(registros)["risco"]
+    assert riscos.tolist() == ["alto", "médio", "médio", "baixo"]
+    assert list(riscos.cat.categories) == CATEGORIAS_RISCO
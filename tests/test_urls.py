@@ -0,0 +1,72 @@
+import pytest
+
+from busca import fundir_rankings
+from urls import deduplicar_urls, normalizar_url
+
+
+@pytest.mark.parametrize(
+    "variante, original",
+    [
+        ("http://www.g1.globo.com/noticia/", "https://g1.globo.com/noticia"),
+        (
+            "https://m.portal.example/politica/materia",
+            "https://portal.example/politica/materia",
+        ),
+        ("https://amp.portal.example/materia", "https://portal.example/materia"),
+        ("https://portal.example/materia/amp/", "https://portal.example/materia"),
+        ("https://portal.example/materia.amp", "https://portal.example/materia"),
+        ("https://portal.example:443/materia", "https://portal.example/materia"),
+        (
+            "https://portal.example//politica//materia",
+            "https://portal.example/politica/materia",
+        ),
+        (
+            "https://portal.example/materia#comentarios",
+            "https://portal.example/materia",
+        ),
+        (
+            "https://portal.example/materia?utm_source=google&fbclid=abc&id=7",
+            "https://portal.example/materia?id=7",
+        ),
+        (
+            "https://portal.example/busca?b=2&a=1",
+            "https://portal.example/busca?a=1&b=2",
+        ),
+        ("https://Portal.Example/materia", "https://portal.example/materia"),
+    ],
+)
+def test_variantes_da_mesma_pagina(variante, original):
+    assert normalizar_url(variante) == normalizar_url(original)
+
+
+@pytest.mark.parametrize(
+    "um, outro",
+    [
+        ("https://portal.example/materia?id=7", "https://portal.example/materia?id=8"),
+        ("https://portal.example/materia", "https://outro.example/materia"),
+        ("https://portal.example:8080/materia", "https://portal.example/materia"),
+        ("https://portal.example/Materia", "https://portal.example/materia"),
+    ],
+)
+def test_paginas_diferentes(um, outro):
+    assert normalizar_url(um) != normalizar_url(outro)
+
+
+def test_deduplicar_urls_mantem_a_primeira_vista():
+    urls = [
+        "https://www.portal.example/a?utm_medium=social",
+        "https://portal.example/b",
+        "http://portal.example/a/",
+    ]
+    assert deduplicar_urls(urls) == urls[:2]
+
+
+def test_fundir_rankings():
+    google = ["https://portal.example/a", "https://portal.example/b?utm_source=x"]
+    bing = ["https://www.portal.example/b", "https://portal.example/c"]
+    # "b" aparece nos dois motores e sobe para o topo, com a URL vista primeiro
+    assert fundir_rankings([google, bing]) == [
+        "https://portal.example/b?utm_source=x",
+        "https://portal.example/a",
+        "https://portal.example/c",
+    ]
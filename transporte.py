@@ -0,0 +1,113 @@
+import threading
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
+
+import configuracao
+from limitador import HOST_TAXA, LimitadorAdaptativo
+
+# Timeout padrão (conexão, leitura) em segundos
+TIMEOUT_PADRAO = (5, 20)
+
+# Quantidade de hosts com pool mantido e conexões keep-alive por host
+POOL_HOSTS = 32
+POOL_POR_HOST = 8
+
+# Retentativas com backoff exponencial para 5xx. 429 e 503 (e o Retry-After)
+# ficam de fora: são retentados em `get`, passando pelo limitador do host
+RETENTATIVAS = 3
+BACKOFF = 0.5
+STATUS_RETENTATIVA = [500, 502, 504]
+
+# Ritmo de requisições por host, ajustado conforme 429/Retry-After/CAPTCHAs
+LIMITADOR_HOSTS = LimitadorAdaptativo(
+    taxa=float(configuracao.obter("HTTP_HOST_RPS", HOST_TAXA))
+)
+
+_sessao = None
+_lock = threading.Lock()
+
+
+class AdaptadorComTimeout(HTTPAdapter):
+    """HTTPAdapter que aplica um timeout padrão quando nenhum é informado."""
+
+    def __init__(self, *args, timeout=TIMEOUT_PADRAO, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def criar_sessao(
+    pool_hosts=POOL_HOSTS,
+    pool_por_host=POOL_POR_HOST,
+    timeout=TIMEOUT_PADRAO,
+    retentativas=RETENTATIVAS,
+):
+    retry = Retry(
+        total=retentativas,
+        connect=retentativas,
+        read=retentativas,
+        status=retentativas,
+        backoff_factor=BACKOFF,
+        status_forcelist=STATUS_RETENTATIVA,
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adaptador = AdaptadorComTimeout(
+        pool_connections=pool_hosts,
+        pool_maxsize=pool_por_host,
+        max_retries=retry,
+        timeout=timeout,
+    )
+
+    sessao = requests.Session()
+    # Sem verificação de certificado, o urllib3 avisaria a cada requisição HTTPS
+    sessao.verify = False
+    urllib3.disable_warnings(InsecureRequestWarning)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+
+def obter_sessao():
+    """Sessão compartilhada pelo processo (pesquisa e download de notícias)."""
+    global _sessao
+    if _sessao is None:
+        with _lock:
+            if _sessao is None:
+                _sessao = criar_sessao()
+    return _sessao
+
+
+def get(url, limitador=LIMITADOR_HOSTS, **kwargs):
+    """GET pela sessão compartilhada, no ritmo permitido ao host da URL.
+
+    Respostas 429/503 desaceleram só aquele host (ver LimitadorAdaptativo) e
+    são retentadas até RETENTATIVAS vezes. `limitador=None` desativa o controle.
+    """
+    for tentativa in range(RETENTATIVAS + 1):
+        if limitador is not None:
+            limitador.aguardar(url)
+        response = obter_sessao().get(url, **kwargs)
+        if (
+            limitador is None
+            or not limitador.registrar_resposta(
+                url, response.status_code, response.headers
+            )
+            or tentativa == RETENTATIVAS
+        ):
+            return response
+        print(
+            f"Limite atingido em {urlparse(url).hostname} "
+            f"(status {response.status_code}), nova tentativa"
+        )
+        response.close()
@@ -0,0 +1,229 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from busca import gerar_links_de_varias_paginas
+from coleta import gerar_conteudo_links
+from deduplicacao import classificador_sem_duplicatas
+from exportacao import salvar_planilhas
+from extracao import AGENDADOR_LLM, LLM_WORKERS, Extracao, extrai_resumo_final
+from fluxo import mapear_em_fluxo
+
+COLUNAS_EXTRACAO = [
+    "crimes",
+    "risco",
+    "resumo",
+    "input_tokens",
+    "output_tokens",
+    "custo_usd",
+    # "fonte",
+    "link",
+    "data_consulta",
+    "tokens_economizados",
+    "duplicata_de",
+]
+# Ordem de prioridade dos riscos, do mais grave ao menos grave
+CATEGORIAS_RISCO = ["alto", "médio", "baixo"]
+# Grafias devolvidas pela LLM além das de CATEGORIAS_RISCO (após strip/lower)
+GRAFIAS_RISCO = {"medio": "médio"}
+
+
+def _notificar(itens, progresso, etapa):
+    for item in itens:
+        progresso(etapa, item)
+        yield item
+
+
+def classificar_noticia(artigo, sujeito):
+    noticia = {"link": artigo["link"], "texto": artigo["conteudo"]}
+    extracao = Extracao(noticia=noticia, sujeito=sujeito, agendador=AGENDADOR_LLM)
+    return extracao.extrai_json()
+
+
+def pesquisar_e_classificar(
+    termo_pesquisa,
+    num_paginas,
+    sujeito,
+    forcar_atualizacao=False,
+    motores=("google",),
+    progresso=None,
+):
+    """Pipeline em fluxo: pesquisa -> download -> deduplicação -> classificação.
+
+    Cada página de resultados alimenta o download assim que é parseada, e cada
+    notícia baixada segue direto para a LLM, sobrepondo a latência de rede e a
+    da LLM. Notícias quase idênticas (republicadas por outros portais) são
+    classificadas uma única vez. Produz tuplas (artigo, extracao_json) na ordem
+    de conclusão.
+
+    `progresso(etapa, item)`, se dado, é chamado a cada link encontrado
+    ("links") e a cada notícia baixada ("artigos").
+    """
+    links = gerar_links_de_varias_paginas(
+        termo_pesquisa,
+        num_paginas,
+        motores=motores,
+        forcar_atualizacao=forcar_atualizacao,
+    )
+    if progresso is not None:
+        links = _notificar(links, progresso, "links")
+    artigos = gerar_conteudo_links(links)
+    if progresso is not None:
+        artigos = _notificar(artigos, progresso, "artigos")
+    classificar = classificador_sem_duplicatas(
+        lambda artigo: classificar_noticia(artigo, sujeito)
+    )
+    return mapear_em_fluxo(
+        lambda artigo: (artigo, classificar(artigo)),
+        artigos,
+        max_workers=LLM_WORKERS,
+    )
+
+
+def executar_triagem(
+    termo_pesquisa,
+    num_paginas,
+    sujeito=None,
+    forcar_atualizacao=False,
+    motores=("google",),
+    progresso=None,
+    armazem=None,
+    resumo=None,
+):
+    """Pesquisa e classifica as notícias de um sujeito.
+
+    Retorna (json_saida, df): os metadados da consulta ("Consulta" e "Data de
+    Pesquisa") e um DataFrame com uma linha por notícia classificada. O texto
+    das notícias não fica em memória: com um `armazem`
+    (resultados.ArmazemResultados), cada notícia é gravada assim que é
+    classificada. Além das etapas de `pesquisar_e_classificar`, `progresso`
+    recebe cada classificação ("classificados"). Com um `resumo`
+    (extracao.ResumoIncremental), o resumo final vai sendo construído conforme
+    as classificações chegam.
+    """
+    sujeito = sujeito or termo_pesquisa
+
+    json_saida = {}
+    json_saida["Consulta"] = sujeito
+    json_saida["Data de Pesquisa"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    registros = []
+    if armazem is not None:
+        armazem.iniciar(json_saida)
+
+    resultados = pesquisar_e_classificar(
+        termo_pesquisa, num_paginas, sujeito, forcar_atualizacao, motores, progresso
+    )
+    for artigo, extracao1_json in resultados:
+        print(f"Link: {artigo['link']}")
+        print(f"Conteúdo: {artigo['conteudo']}")
+        print("=" * 50)
+
+        extracao1_json["data_consulta"] = json_saida["Data de Pesquisa"]
+        registros.append(extracao1_json)
+        if resumo is not None:
+            resumo.adicionar(extracao1_json.get("resumo"))
+        if armazem is not None:
+            armazem.registrar(
+                {
+                    "link": artigo["link"],
+                    "texto": artigo["conteudo"],
+                    "extracao": extracao1_json,
+                }
+            )
+        if progresso is not None:
+            progresso("classificados", extracao1_json)
+
+    print(f"Total de links processados: {len(registros)}")
+    return json_saida, montar_dataframe(registros)
+
+
+def montar_dataframe(registros):
+    """DataFrame das extrações, montado de uma vez a partir da lista de registros.
+
+    As colunas de COLUNAS_EXTRACAO vêm primeiro, seguidas de chaves extras
+    presentes nos registros, e `risco` já sai categórica (ver CATEGORIAS_RISCO).
+    """
+    df = pd.DataFrame.from_records(registros)
+    extras = [coluna for coluna in df.columns if coluna not in COLUNAS_EXTRACAO]
+    df = df.reindex(columns=COLUNAS_EXTRACAO + extras)
+    df["risco"] = categorizar_risco(df["risco"])
+    return df
+
+
+def normalizar_risco(risco):
+    """Risco em minúsculas e sem espaços, com "medio" grafado como "médio"."""
+    if not isinstance(risco, str):
+        return risco
+    risco = risco.strip().lower()
+    return GRAFIAS_RISCO.get(risco, risco)
+
+
+def categorizar_risco(riscos):
+    """Série categórica ordenada (ver CATEGORIAS_RISCO) dos `riscos` normalizados.
+
+    Valores fora de CATEGORIAS_RISCO mesmo depois de normalizados viram NaN.
+    """
+    return pd.Categorical(
+        pd.Series(riscos, dtype=object).map(normalizar_risco),
+        categories=CATEGORIAS_RISCO,
+        ordered=True,
+    )
+
+
+def risco_final(df_final):
+    riscos = set(df_final["risco"].dropna())
+    for risco in CATEGORIAS_RISCO:
+        if risco in riscos:
+            return risco
+    return CATEGORIAS_RISCO[-1]
+
+
+def consolidar_triagem(df, resumo=None):
+    """Ordena as notícias por risco e gera o resumo final (output_final.json).
+
+    `resumo` é o ResumoIncremental passado a `executar_triagem`, se houver;
+    senão o resumo final é feito aqui, a partir de `df`.
+    """
+    # Ordenar por riscos (categórica ordenada, ver montar_dataframe)
+    df = df.sort_values("risco")
+
+    # Resumo final
+    json_final = {}
+    json_final["crimes"] = "Resultado da análise:"
+    if resumo is not None:
+        json_final["resumo"] = resumo.finalizar()
+    else:
+        json_final["resumo"] = extrai_resumo_final(df_final=df, agendador=AGENDADOR_LLM)
+    json_final["risco"] = risco_final(df_final=df)
+
+    return df, json_final
+
+
+def crimes_unicos(df):
+    crimes_lista = [
+        crime for crime in df["crimes"].tolist() if pd.notna(crime)
+    ]  # drop "nan" items
+    crimes_individuais = [
+        crime.strip() for lista in crimes_lista for crime in lista.split(",")
+    ]
+    return sorted(
+        set([crime for crime in crimes_individuais if "nenhum" not in crime.lower()])
+    )
+
+
+def salvar_triagem(diretorio_saida, df, json_final):
+    """Grava extracao.csv, extracao.xlsx e output_final.json.
+
+    O texto de cada notícia fica no resultados.jsonl gravado durante a
+    triagem (ver `executar_triagem`).
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+
+    salvar_planilhas(df, os.path.join(diretorio_saida, "extracao"))
+
+    with open(
+        os.path.join(diretorio_saida, "output_final.json"), "w", encoding="utf-8"
+    ) as f:
+        json.dump(json_final, f, ensure_ascii=False, indent=4)
@@ -0,0 +1,65 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Parâmetros de rastreamento que não mudam o conteúdo da página
+PARAMETROS_RASTREAMENTO = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ref",
+    "ref_src",
+    "cmpid",
+    "ocid",
+    "_ga",
+    "_gl",
+    "amp",
+    "outputtype",
+}
+PREFIXOS_RASTREAMENTO = ("utm_", "at_", "xtor")
+
+_SUFIXO_AMP = re.compile(r"(/amp/?|\.amp|/amp\.html?)$", re.IGNORECASE)
+
+
+def normalizar_url(url):
+    """Forma canônica de uma URL, para identificar a mesma página em variantes.
+
+    Unifica http/https, `www.`/`m.`/`amp.`, portas padrão, variantes AMP,
+    barra final, fragmento e parâmetros de rastreamento (utm_*, fbclid...).
+    """
+    partes = urlparse(url.strip())
+
+    host = (partes.hostname or "").lower()
+    for prefixo in ("www.", "m.", "amp."):
+        if host.startswith(prefixo):
+            host = host[len(prefixo) :]
+    if partes.port and partes.port not in (80, 443):
+        host = f"{host}:{partes.port}"
+
+    caminho = _SUFIXO_AMP.sub("", partes.path)
+    caminho = re.sub(r"/{2,}", "/", caminho).rstrip("/") or "/"
+
+    parametros = sorted(
+        (chave, valor)
+        for chave, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if chave.lower() not in PARAMETROS_RASTREAMENTO
+        and not chave.lower().startswith(PREFIXOS_RASTREAMENTO)
+    )
+
+    return urlunparse(("https", host, caminho, "", urlencode(parametros), ""))
+
+
+def deduplicar_urls(urls):
+    """Remove URLs que apontam para a mesma página, mantendo a primeira vista."""
+    vistas = set()
+    unicas = []
+    for url in urls:
+        chave = normalizar_url(url)
+        if chave not in vistas:
+            vistas.add(chave)
+            unicas.append(url)
+    return unicas